@@ -0,0 +1,40 @@
+from src.batch import make_jobs, run_batch, write_results
+import argparse
+
+
+parser = argparse.ArgumentParser()
+# Arguments
+parser.add_argument("paths", nargs="+", type=str, help="Paths to the grids.")
+parser.add_argument("--placements", default=0, type=int, help="Random robot placements per grid, 0 keeps the file ones.")
+parser.add_argument("--seed", default=0, type=int, help="Seed of the first random placement.")
+parser.add_argument("--n_robots", default=None, type=int, help="Robots per random placement, as in the file by default.")
+parser.add_argument("--exploration_planner", default="robot", choices=["robot", "fleet", "incremental"],
+                    help="Per robot BFS, a shared frontier distance field for all robots or per robot BFS reusing "
+                         "the frontier distances learned by earlier searches.")
+parser.add_argument("--transport_planner", default="astar", choices=["astar", "hpa", "junction", "jps"],
+                    help="AStar, hierarchical path-finding, corridor graph search or Jump Point Search for the "
+                         "paths to the mazes.")
+parser.add_argument("--maze_order", default="farthest", choices=["farthest", "nearest"],
+                    help="Handing out the remaining mazes farthest or nearest from the start first.")
+parser.add_argument("--overlap", default=False, action="store_true",
+                    help="Transporting found mazes while the other robots still explore.")
+parser.add_argument("--fast_forward", default=False, action="store_true",
+                    help="Simulating the transportation only at the steps with robot decisions, same results.")
+parser.add_argument("--planning_workers", default=0, type=int,
+                    help="Worker processes planning the robots of one run in parallel, 0 plans in the run process.")
+parser.add_argument("--workers", default=None, type=int, help="Number of worker processes, all cores by default.")
+parser.add_argument("--output", default="results.csv", type=str, help="Output file, .json or .csv.")
+
+
+def main(args):
+    # Runs every grid and placement combination without visualization and stores the metrics
+    jobs = make_jobs(args.paths, args.placements, args.seed, args.n_robots, args.exploration_planner,
+                     args.transport_planner, args.overlap, args.fast_forward, args.planning_workers, args.maze_order)
+    results = run_batch(jobs, args.workers)
+    write_results(results, args.output)
+    print(f"Finished {len(results)} runs, results written to {args.output}")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,50 @@
+from src.benchmark import compare, compare_expansions, run_suite, save_baseline, KINDS, SIZES
+import argparse
+import sys
+
+
+parser = argparse.ArgumentParser()
+# Arguments
+parser.add_argument("--sizes", default=SIZES, nargs="+", type=int, help="Sizes of the generated square grids.")
+parser.add_argument("--kinds", default=KINDS, nargs="+", choices=KINDS, help="Kinds of the generated grids.")
+parser.add_argument("--n_robots", default=10, type=int, help="Number of robots.")
+parser.add_argument("--n_mazes", default=20, type=int, help="Number of mazes.")
+parser.add_argument("--seed", default=0, type=int, help="Seed of the generated grids.")
+parser.add_argument("--repeats", default=3, type=int, help="Repeats of the planner timings, the best is kept.")
+parser.add_argument("--expansions", default=False, action="store_true",
+                    help="Only compare the nodes expanded by AStar and JPS on random queries.")
+parser.add_argument("--n_queries", default=50, type=int, help="Number of random queries of --expansions.")
+parser.add_argument("--save", default=None, type=str, help="Store the results as a baseline.")
+parser.add_argument("--baseline", default=None, type=str, help="Compare the results with a stored baseline.")
+parser.add_argument("--tolerance", default=1.5, type=float, help="Allowed slowdown against the baseline.")
+
+
+def main(args):
+    # Runs the benchmark suite and reports the timings and regressions against the baseline
+    if args.expansions:
+        for kind in args.kinds:
+            for size in args.sizes:
+                measured = compare_expansions(kind, size, args.n_queries, args.seed)
+                print(f"{kind}/{size}", " ".join(f"{name}={value:.4f}" if isinstance(value, float)
+                                                 else f"{name}={value}" for name, value in measured.items()))
+        return
+
+    results = run_suite(args.sizes, args.kinds, n_robots=args.n_robots, n_mazes=args.n_mazes, seed=args.seed,
+                        repeats=args.repeats)
+    for key, measured in results.items():
+        print(key, " ".join(f"{name}={value:.4f}" if isinstance(value, float) else f"{name}={value}"
+                            for name, value in measured.items()))
+
+    if args.save is not None:
+        save_baseline(results, args.save)
+    if args.baseline is not None:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print("Regression:", regression)
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,18 @@
+from src.gridfile import convert_grid_file
+import argparse
+
+
+parser = argparse.ArgumentParser()
+# Arguments
+parser.add_argument("source", type=str, help="Path of the grid to convert.")
+parser.add_argument("target", type=str, help="Path of the converted grid, .mzg for binary, otherwise text.")
+
+
+def main(args):
+    # Converts the grid between the text and binary formats
+    convert_grid_file(args.source, args.target)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args)
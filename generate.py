@@ -0,0 +1,31 @@
+from src.generator import generate, write_grid
+import argparse
+
+
+parser = argparse.ArgumentParser()
+# Arguments
+parser.add_argument("path", type=str, help="Path of the generated grid.")
+parser.add_argument("--kind", default="maze", choices=["maze", "rooms"], help="Labyrinth or open rooms.")
+parser.add_argument("--height", default=100, type=int, help="Height of the grid.")
+parser.add_argument("--width", default=100, type=int, help="Width of the grid.")
+parser.add_argument("--n_robots", default=10, type=int, help="Number of robots.")
+parser.add_argument("--n_mazes", default=20, type=int, help="Number of mazes.")
+parser.add_argument("--corridor", default=1, type=int, help="Width of the labyrinth corridors.")
+parser.add_argument("--braid", default=0.0, type=float, help="Fraction of inner labyrinth walls removed.")
+parser.add_argument("--room", default=20, type=int, help="Size of the open rooms.")
+parser.add_argument("--seed", default=None, type=int, help="Seed of the generator.")
+
+
+def main(args):
+    # Generates the grid and writes it in the format read by load_from_file
+    if args.kind == "maze":
+        kwargs = dict(corridor=args.corridor, braid=args.braid)
+    else:
+        kwargs = dict(room=args.room)
+    grid, robots = generate(args.kind, args.height, args.width, args.n_robots, args.n_mazes, args.seed, **kwargs)
+    write_grid(args.path, grid, robots)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    main(args)
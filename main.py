@@ -1,19 +1,54 @@
 import numpy as np
-from src.maincontroler import load_from_file
+from src.grid import Grid
+from src.maincontroler import load_from_file, load_snapshot
+from src.robot import Robot, RobotFleet
+from src.stats import Stats
+from src.textdrawer import TextDrawer
+from src.trajectory import LEFT, CARRYING, TrajectoryLog, read_trajectory
 import pygame
 import argparse
+import time
 
 
 parser = argparse.ArgumentParser()
 # Arguments
 parser.add_argument("--path", default="grids/grid_big2.txt", type=str, help="Path to the grid.")
 parser.add_argument("--width", default=1000, type=int, help="Width of the window.")
-parser.add_argument("--time_delay", default=1, type=int, help="Time delay between steps.")
+parser.add_argument("--time_delay", default=1, type=int, help="Time delay between drawn frames.")
+parser.add_argument("--frame_skip", default=1, type=int, help="Drawing only every n-th simulation step.")
+parser.add_argument("--target_fps", default=0, type=int, help="Maximum drawn frames per second, 0 for no limit.")
 parser.add_argument("--verbose", default=False, action="store_true", help="Printing steps to the console.")
+parser.add_argument("--text_output", default=None, type=str, help="Writing the verbose steps to the file instead.")
+parser.add_argument("--text_frame_skip", default=1, type=int, help="Printing only every n-th verbose step.")
+parser.add_argument("--changed_rows", default=False, action="store_true",
+                    help="Printing only the rows that changed since the last printed verbose step.")
+parser.add_argument("--exploration_planner", default="robot", choices=["robot", "fleet", "incremental"],
+                    help="Per robot BFS, a shared frontier distance field for all robots or per robot BFS reusing "
+                         "the frontier distances learned by earlier searches.")
+parser.add_argument("--transport_planner", default="astar", choices=["astar", "hpa", "junction", "jps"],
+                    help="AStar, hierarchical path-finding, corridor graph search or Jump Point Search for the "
+                         "paths to the mazes.")
+parser.add_argument("--maze_order", default="farthest", choices=["farthest", "nearest"],
+                    help="Handing out the remaining mazes farthest or nearest from the start first.")
+parser.add_argument("--overlap", default=False, action="store_true",
+                    help="Transporting found mazes while the other robots still explore.")
+parser.add_argument("--fast_forward", default=False, action="store_true",
+                    help="Jumping between the transportation steps with decisions, same steps, fewer drawn frames.")
+parser.add_argument("--planning_workers", default=0, type=int,
+                    help="Worker processes planning the robots in parallel, 0 plans in the main process.")
+parser.add_argument("--record", default=None, type=str, help="Writing the robot trajectories to the file for replay.")
+parser.add_argument("--replay", default=None, type=str,
+                    help="Replaying recorded trajectories from the file instead of simulating.")
+parser.add_argument("--snapshot", default=None, type=str,
+                    help="Saving the state of the simulation to the .npz file when S is pressed between the phases.")
+parser.add_argument("--resume", default=None, type=str, help="Continuing the simulation from the .npz snapshot.")
+parser.add_argument("--profile", default=False, action="store_true", help="Printing counters and timers at the end.")
+parser.add_argument("--trace", default=None, type=str, help="Writing per round profiling trace to the file.")
 
 
 class PygameDrawer:
-    # Class for handling the visualization of the grid using Pygame
+    # Class for handling the visualization of the grid using Pygame. The grid is drawn as palette indices and only
+    # positions that changed since the last frame are redrawn on the screen.
     RED = (255, 0, 0)
     GREEN = (0, 255, 0)
     BLUE = (18, 203, 196)
@@ -22,16 +57,37 @@ class PygameDrawer:
     PURPLE = (139, 0, 139)
     GREY = (128, 128, 128)
 
+    # Palette indices of the drawn positions
+    WALL, NOTHING, START, MAZE, UNEXPLORED, ROBOT, ROBOT_CARRYING = range(7)
+    # Fraction of changed positions above which the whole screen is redrawn instead of the single positions
+    FULL_REDRAW = 0.05
+    # Frames per second while waiting for a key between the phases
+    IDLE_FPS = 30
+
     def __init__(self, grid_shape, args):
         self.time_delay = args.time_delay
+        self.frame_skip = max(args.frame_skip, 1)  # Every frame_skip-th step is drawn
+        self.target_fps = args.target_fps  # Upper bound of drawn frames per second, 0 draws every step
 
         self.width = args.width
         self.height = round(grid_shape[0] / grid_shape[1] * self.width)
         # Initializing screen
-        self.grid = np.zeros((grid_shape[0], grid_shape[1], 3))
         self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption("Maze Algorithm")
-        self.surface = pygame.Surface((grid_shape[1], grid_shape[0]))
+        self.palette = [self.BLACK, self.WHITE, self.BLUE, self.PURPLE, self.GREY, self.GREEN, self.RED]
+        self.surface = pygame.Surface((grid_shape[1], grid_shape[0]), depth=8)
+        self.surface.set_palette(self.palette)
+
+        # Palette index of each grid value, indexed by value + 1
+        self.lookup = np.array([self.WALL, self.NOTHING, self.START, self.MAZE], dtype=np.uint8)
+        self.frame = None  # Palette indices currently shown on the screen
+        # Screen coordinates of the borders between the drawn positions
+        self.row_edges = np.ceil(np.arange(grid_shape[0] + 1) * self.height / grid_shape[0]).astype(int)
+        self.col_edges = np.ceil(np.arange(grid_shape[1] + 1) * self.width / grid_shape[1]).astype(int)
+
+        self.steps = 0  # Number of draw_grid calls
+        self.last_frame_time = 0.0
+        self.clock = pygame.time.Clock()  # Paces the idle loop
 
     def draw_grid(self, grid, robots, explored=False, check_quit=True):
         # Draws the grid on the Pygame screen.
@@ -39,40 +95,126 @@ class PygameDrawer:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.quit()
+        if not self.frame_due():
+            return
         pygame.time.delay(self.time_delay)
+        time_start = time.perf_counter() if grid.stats is not None else None
+        self.render(grid, robots, explored)
+        if time_start is not None:
+            grid.stats.record("draw_grid", time.perf_counter() - time_start)
+
+    def idle(self, grid, robots, explored=False):
+        # Draws the grid while waiting between the phases. Every call draws, so a skipped last step is shown, and
+        # waits for the next idle frame, so the waiting loop does not keep a core busy.
+        self.render(grid, robots, explored)
+        self.clock.tick(self.IDLE_FPS)
 
-        self.grid[grid.grid == -1, :] = self.BLACK
-        self.grid[grid.grid == 0, :] = self.WHITE
-        self.grid[grid.grid == 1, :] = self.BLUE
-        self.grid[grid.grid == 2, :] = self.PURPLE
+    def render(self, grid, robots, explored=False):
+        # Renders the grid and the robots and updates the changed part of the screen
+        frame = self.lookup[grid.grid + 1]
         if explored:
-            self.grid[np.logical_not(grid.explored), :] = self.GREY
-        for rob in robots:
-            self.grid[rob.x, rob.y, :] = self.RED if rob.carry_maze else self.GREEN
-
-        # Draw the array onto the surface
-        pygame.surfarray.blit_array(self.surface, self.grid.transpose((1, 0, 2)))
-        # Transform the surface to screen size
-        surface = pygame.transform.scale(self.surface, (self.width, self.height))
-        self.screen.fill((0, 0, 0))
-        # Blit the transformed surface onto the screen
-        self.screen.blit(surface, (0, 0))
-        pygame.display.update()
+            frame[grid.explored == 0] = self.UNEXPLORED
+        if isinstance(robots, RobotFleet):
+            # Robots of a fleet are drawn from its arrays at once
+            x, y = robots.positions()
+            carrying = np.array(robots.carry_maze, dtype=bool)[robots.active]
+            frame[x, y] = np.where(carrying, self.ROBOT_CARRYING, self.ROBOT)
+        else:
+            for rob in robots:
+                frame[rob.x, rob.y] = self.ROBOT_CARRYING if rob.carry_maze else self.ROBOT
+
+        changed = None if self.frame is None else np.nonzero(frame != self.frame)
+        if changed is None or changed[0].size > self.FULL_REDRAW * frame.size:
+            # Draw the array onto the surface
+            pygame.surfarray.blit_array(self.surface, frame.T)
+            # Transform the surface to screen size and blit it onto the screen
+            self.screen.blit(pygame.transform.scale(self.surface, (self.width, self.height)), (0, 0))
+            pygame.display.update()
+        elif changed[0].size > 0:
+            # Redraw only the changed positions and update only their part of the screen
+            rects = [self.fill_position(x, y, frame[x, y]) for x, y in zip(*changed)]
+            pygame.display.update(rects)
+        self.frame = frame
+
+    def frame_due(self):
+        # Decides if the current step is drawn, so the simulation can run faster than the display
+        self.steps += 1
+        if (self.steps - 1) % self.frame_skip != 0:
+            return False
+        if self.target_fps > 0:
+            now = time.perf_counter()
+            if now - self.last_frame_time < 1 / self.target_fps:
+                return False
+            self.last_frame_time = now
+        return True
+
+    def replay(self, path: str):
+        # Draws the steps of a trajectory file without running the planners, the speed is given by time_delay,
+        # frame_skip and target_fps like for the simulation
+        cells, explored, records = read_trajectory(path)
+        grid = Grid(cells)
+        grid.explored[:] = explored
+        robots = RobotFleet([Robot(0, 0) for _ in range(records.dtype["x"].shape[0])])
+        for record in records:
+            # Mazes disappear where a robot started carrying
+            picked = (record["state"] == CARRYING) & ~np.array(robots.carry_maze, dtype=bool)
+            grid.grid[record["x"][picked], record["y"][picked]] = 0
+            robots.active[:] = record["state"] != LEFT
+            robots.carry_maze[:] = (record["state"] == CARRYING).tolist()
+            robots.x[:], robots.y[:] = record["x"].tolist(), record["y"].tolist()
+            robots.explore(grid)
+            self.draw_grid(grid, robots, True)
+        return grid, robots
+
+    def fill_position(self, x, y, color):
+        # Fills the screen rectangle of the (x, y) position and returns it
+        rect = pygame.Rect(self.col_edges[y], self.row_edges[x],
+                           self.col_edges[y + 1] - self.col_edges[y], self.row_edges[x + 1] - self.row_edges[x])
+        self.screen.fill(self.palette[color], rect)
+        return rect
 
     def quit(self):
         # Quits the Pygame app
         pygame.quit()
 
 
+def replay(args):
+    # Replays a trajectory file and keeps the last frame on the screen until the window is closed
+    cells, _, _ = read_trajectory(args.replay)
+    pg_drawer = PygameDrawer(cells.shape, args)
+    grid, robots = pg_drawer.replay(args.replay)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE):
+                running = False
+        pg_drawer.idle(grid, robots, True)
+    pg_drawer.quit()
+
+
 def main(args):
-    # Load the grid and robots from the specified file
-    mc = load_from_file(args.path)
-    # Create a PygameDrawer object to visualize the grid and robots
+    if args.replay is not None:
+        replay(args)
+        return
+    # Load the grid and robots from the specified file or continue from a snapshot
+    stats = Stats(args.trace) if args.profile or args.trace is not None else None
+    if args.resume is not None:
+        mc = load_snapshot(args.resume, stats=stats, planning_workers=args.planning_workers)
+    else:
+        mc = load_from_file(args.path, exploration_planner=args.exploration_planner,
+                            transport_planner=args.transport_planner, stats=stats,
+                            planning_workers=args.planning_workers, maze_order=args.maze_order)
+    if args.record is not None:
+        mc.trajectory = TrajectoryLog(args.record, mc.grid, mc.robots)
+    # Create a PygameDrawer object to visualize the grid and robots, and a TextDrawer for the verbose output
     pg_drawer = PygameDrawer(mc.grid.grid.shape, args)
-    # Initialize flags for exploration and transportation
+    verbose = False
+    if args.verbose or args.text_output is not None:
+        verbose = TextDrawer(args.text_output, args.text_frame_skip, args.changed_rows)
+    # Initialize flags for exploration and transportation, a snapshot may be taken after a phase
     running = True
-    exploration = False
-    transportation = False
+    exploration = mc.exploration_steps > 0
+    transportation = exploration and len(mc.robots) == 0
 
     while running:
         for event in pygame.event.get():
@@ -80,24 +222,37 @@ def main(args):
                 running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
+                    # Perform both phases together if overlapping
+                    if args.overlap and not transportation:
+                        mc.do_overlapped(verbose=verbose, pg_drawer=pg_drawer)
+                        exploration = transportation = True
                     # Perform exploration if not already done
-                    if not exploration:
-                        mc.do_exploration(verbose=False, pg_drawer=pg_drawer)
+                    elif not exploration:
+                        mc.do_exploration(verbose=verbose, pg_drawer=pg_drawer)
                         exploration = True
                     # Perform transportation if exploration is done but transportation is not
                     elif not transportation:
-                        mc.do_transportation(verbose=False, pg_drawer=pg_drawer)
+                        mc.do_transportation(verbose=verbose, pg_drawer=pg_drawer, fast_forward=args.fast_forward)
                         transportation = True
                     # Exit the loop if both exploration and transportation are done
                     else:
                         running = False
+                if event.key == pygame.K_s and args.snapshot is not None:
+                    mc.save_snapshot(args.snapshot)
         # Draw the grid and robots on the Pygame screen
-        pg_drawer.draw_grid(mc.grid, mc.robots, exploration or transportation, check_quit=False)
+        pg_drawer.idle(mc.grid, mc.robots, exploration or transportation)
 
     # Quit the Pygame application
     pg_drawer.quit()
+    mc.close()
+    if verbose:
+        verbose.close()
     # Print the final result of the maze algorithm
     mc.print_result()
+    if mc.trajectory is not None:
+        mc.trajectory.close()
+    if stats is not None:
+        stats.close()
 
 
 if __name__ == "__main__":
@@ -1,100 +1,96 @@
+from src.path import Path
+import heapq
 import numpy as np
+import time
 
 
 def AStar(start, goal, grid):
     # Performs the A* algorithm to find a path from the start position to the goal position
-    grid_seen = (grid.grid > -1) * grid.explored - 1  # Keeps track of seen positions in the grid
+    time_start = time.perf_counter() if grid.stats is not None else None
+    # Positions are flat indices of the padded grid, so the wall border keeps neighbours from wrapping around rows
+    width = grid.padded_grid.shape[1]
+    # Keeps track of seen positions in the flattened grid (-1 blocked, 0 free, 1 opened, 2 closed)
+    grid_seen = ((grid.padded_grid > -1) * grid.padded_explored - 1).astype(np.int8).ravel()
     # Stores the distance from the start position to each position in the grid
-    distance = np.zeros_like(grid_seen)
+    distance = np.zeros(grid_seen.shape, dtype=np.int32)
+    # Stores the flat index of the previous position for path reconstruction (-1 marks the start)
+    previous = np.full(grid_seen.shape, -1, dtype=np.int32)
 
-    opened = list()  # List to store nodes to be explored
-    previous = dict()  # Dictionary to store previous nodes for path reconstruction
-    previous[start] = None  # Sets the previous node of the start position to None
+    opened = list()  # Binary heap of (cost, heuristic, index) entries to be explored
 
     # Finds a path using A*
-    path = find_path(start, goal, distance, grid_seen, opened, previous)
+    start_idx = (int(start[0]) + 1) * width + int(start[1]) + 1
+    goal_idx = (int(goal[0]) + 1) * width + int(goal[1]) + 1
+    path = find_path(start_idx, goal_idx, width, distance, grid_seen, opened, previous)
+    if time_start is not None:
+        grid.stats.record("astar", time.perf_counter() - time_start, int((grid_seen == 2).sum()))
     return path
 
 
-def find_path(start, goal, distance, grid_seen, opened, previous):
+def find_path(start, goal, width, distance, grid_seen, opened, previous):
     # Expands nodes in the A* search until convergence or all nodes are explored
-    converged = False
-
     if start == goal:
-        converged = True
+        return Path.empty(width - 2)
 
-    if not converged:
-        # Expanding first node
-        prev = start
-        if expand_node(prev, goal, distance, grid_seen, opened, previous):
-            return reconstruct_path(previous, goal)
+    heuristic = manhattan_heuristic(start, goal, width)
+    heapq.heappush(opened, (heuristic, heuristic, start))
 
-    while len(opened) > 0 and not converged:
+    while len(opened) > 0:
         # Expanding until convergence
-        to_expand = pick_node(opened, distance)
-        if expand_node(to_expand, goal, distance, grid_seen, opened, previous):
-            converged = True
-            return reconstruct_path(previous, goal)
-    return []
+        _, _, to_expand = heapq.heappop(opened)
+        if grid_seen[to_expand] == 2:
+            # Skips stale duplicate entries of already closed nodes
+            continue
+        if expand_node(to_expand, goal, width, distance, grid_seen, opened, previous):
+            return reconstruct_path(previous, distance, goal, width)
+    return Path.empty(width - 2)
 
 
-def expand_node(node, goal, distance, grid_seen, opened, previous):
+def expand_node(node, goal, width, distance, grid_seen, opened, previous):
     # Expands a node by considering its neighboring positions
-    x, y = node[0], node[1]
-    grid_seen[x, y] = 2  # Marks the current position as closed
+    grid_seen[node] = 2  # Marks the current position as closed
+    dist = int(distance[node]) + 1
 
-    for x_open, y_open in [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]:
-        if x_open == goal[0] and y_open == goal[1]:
+    for node_open in (node - 1, node + 1, node - width, node + width):
+        if node_open == goal:
             # We found the goal node
-            previous[goal] = (x, y)
+            previous[goal] = node
             return True
 
         # Opens a neighboring node
-        if open_node(x_open, y_open, node, goal, distance, grid_seen, opened):
-            previous[(x_open, y_open)] = (x, y)
+        if open_node(node_open, dist, goal, width, distance, grid_seen, opened):
+            previous[node_open] = node
 
     return False
 
 
-def pick_node(opened, distance):
-    # Picks the node from the list with the lowest cost
-    to_expand = min(opened, key= lambda n: n[2] + distance[n[0], n[1]])
-    opened.remove(to_expand)
-    return to_expand
-
-
-def open_node(x_open, y_open, previous_node, goal, distance, grid_seen, opened):
+def open_node(node_open, dist, goal, width, distance, grid_seen, opened):
     # Opens a neighboring node
-    dist = distance[previous_node[0], previous_node[1]] + 1
-    if grid_seen[x_open, y_open] == 0:
-        # Opens a node if it has not been seen before
-        opened.append((x_open, y_open, manhattan_heuristic(x_open, y_open, goal)))
-        distance[x_open, y_open] = dist
-        grid_seen[x_open, y_open] = 1
+    seen = grid_seen[node_open]
+    if seen == 0 or (seen == 1 and dist < distance[node_open]):
+        # Opens a node if it has not been seen before or reopens it if a shorter path to it is found,
+        # the outdated heap entry is left in place and skipped once the node is closed
+        heuristic = manhattan_heuristic(node_open, goal, width)
+        heapq.heappush(opened, (dist + heuristic, heuristic, node_open))
+        distance[node_open] = dist
+        grid_seen[node_open] = 1
         return True
-
-    elif grid_seen[x_open, y_open] == 1:
-        # Reopens a node if a shorter path to it is found
-        if dist < distance[x_open, y_open]:
-            distance[x_open, y_open] = dist
-            return True
     return False
 
 
-def reconstruct_path(previous, goal):
-    # Reconstructs the path from the previous nodes
-    path = list()
-    path.append(goal)
+def reconstruct_path(previous, distance, goal, width):
+    # Reconstructs the path from the previous nodes, the start position (without previous) is left out
+    path = np.empty(distance[previous[goal]] + 1, dtype=np.int32)
+    current = goal
 
-    current = previous[goal]
-    while current is not None:
-        # Appends the current node to the path
-        path.append(current)
+    for i in range(path.size):
+        path[i] = current
         current = previous[current]
-    return path[:-1]  # Returns the path without the start position
-
+    return Path.from_padded(path, width)
 
-def manhattan_heuristic(x, y, goal):
-    # Calculates the Manhattan heuristic value between two positions
-    return abs(goal[0] - x) + abs(goal[1] - y)
 
+def manhattan_heuristic(node, goal, width):
+    # Calculates the Manhattan heuristic value between two flat positions
+    x, y = divmod(node, width)
+    goal_x, goal_y = divmod(goal, width)
+    return abs(goal_x - x) + abs(goal_y - y)
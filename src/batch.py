@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from src.gridfile import read_grid_file
+from src.maincontroler import MainController
+from src.robot import Robot
+import numpy as np
+import csv
+import json
+import time
+
+# Columns of the result rows, in the order they are written to CSV
+RESULT_FIELDS = ["path", "placement_seed", "n_robots", "exploration_planner", "transport_planner", "overlap",
+                 "fast_forward", "planning_workers", "maze_order", "start_found", "exploration_steps",
+                 "transportation_steps", "total_steps", "mazes", "carried_mazes", "wall_time", "error"]
+
+
+def place_robots(grid: np.array, n_robots: int, seed: int) -> list[Robot]:
+    # Places robots on distinct random free positions of the grid
+    free = np.flatnonzero(grid == 0)
+    positions = np.random.default_rng(seed).choice(free, size=min(n_robots, free.size), replace=False)
+    return [Robot(int(p // grid.shape[1]), int(p % grid.shape[1])) for p in positions]
+
+
+def run_simulation(path: str, placement_seed: int = None, n_robots: int = None,
+                   exploration_planner: str = "robot", transport_planner: str = "astar", overlap: bool = False,
+                   fast_forward: bool = False, planning_workers: int = 0, maze_order: str = "farthest") -> dict:
+    # Runs the exploration and transportation for one grid file without any visualization and returns its metrics.
+    # Without a placement seed the robots from the file are used, otherwise n_robots (by default as many as in the
+    # file) are placed randomly. With overlap the phases run together, fast_forward and planning_workers only
+    # change how the simulation runs, not its result.
+    wall_time = time.perf_counter()
+    grid, robots = read_grid_file(path)
+    if placement_seed is not None:
+        robots = place_robots(grid.grid, len(robots) if n_robots is None else n_robots, placement_seed)
+    n_robots = len(robots)
+
+    with MainController(grid, robots, exploration_planner=exploration_planner, transport_planner=transport_planner,
+                        planning_workers=planning_workers, maze_order=maze_order) as mc:
+        if overlap:
+            mc.do_overlapped()
+        else:
+            mc.do_exploration()
+            mc.do_transportation(fast_forward=fast_forward)
+
+    return {
+        "path": path,
+        "placement_seed": placement_seed,
+        "n_robots": n_robots,
+        "exploration_planner": exploration_planner,
+        "transport_planner": transport_planner,
+        "overlap": overlap,
+        "fast_forward": fast_forward,
+        "planning_workers": planning_workers,
+        "maze_order": maze_order,
+        "start_found": bool(mc.start_found),
+        "exploration_steps": mc.exploration_steps,
+        "transportation_steps": mc.transportation_steps,
+        "total_steps": mc.exploration_steps + mc.transportation_steps,
+        "mazes": int(mc.grid.n_mazes),
+        "carried_mazes": mc.carried_mazes(),
+        "wall_time": time.perf_counter() - wall_time,
+        "error": None,
+    }
+
+
+def _run_job(job: dict) -> dict:
+    # Unpacks one job for the process pool, a failing run gives a row with its error instead of stopping the batch
+    try:
+        return run_simulation(**job)
+    except Exception as error:
+        return {**job, "error": f"{type(error).__name__}: {error}"}
+
+
+def make_jobs(paths: list[str], placements: int = 0, seed: int = 0, n_robots: int = None,
+              exploration_planner: str = "robot", transport_planner: str = "astar",
+              overlap: bool = False, fast_forward: bool = False, planning_workers: int = 0,
+              maze_order: str = "farthest") -> list[dict]:
+    # Creates one job per grid file and robot placement, zero placements keep the robots from the files
+    seeds = [None] if placements == 0 else list(range(seed, seed + placements))
+    return [dict(path=path, placement_seed=s, n_robots=n_robots, exploration_planner=exploration_planner,
+                 transport_planner=transport_planner, overlap=overlap, fast_forward=fast_forward,
+                 planning_workers=planning_workers, maze_order=maze_order)
+            for path in paths for s in seeds]
+
+
+def run_batch(jobs: list[dict], workers: int = None) -> list[dict]:
+    # Runs the jobs across a process pool, the results are in the same order as the jobs.
+    # With a single worker the jobs run in the current process.
+    if workers == 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_job, jobs))
+
+
+def write_results(results: list[dict], path: str):
+    # Writes the results as JSON if the path ends with .json, otherwise as CSV
+    with open(path, "w", newline="") as file:
+        if path.endswith(".json"):
+            json.dump(results, file, indent=2)
+        else:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
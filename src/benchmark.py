@@ -0,0 +1,114 @@
+from src.astar import AStar
+from src.bfs import BFS
+from src.generator import generate
+from src.grid import Grid
+from src.jps import JPS
+from src.maincontroler import MainController
+from src.robot import Robot
+from src.stats import Stats
+import json
+import numpy as np
+import time
+
+# Default scaling study, whole runs on the largest generated grids take minutes
+SIZES = (50, 100, 200, 500)
+KINDS = ("maze", "rooms")
+
+
+def _best_time(function, repeats: int) -> float:
+    # Returns the best wall time of the function out of the repeats
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _controller(grid, robots, explored: bool) -> MainController:
+    # Creates a controller on a copy of the generated grid, optionally with the whole grid already explored
+    mc = MainController(Grid(grid.copy()), [Robot(x, y) for x, y in robots])
+    if explored:
+        mc.grid.explored[:] = True
+        mc.grid.exploration_level[:] = mc.grid.recalculate_exploration_levels()
+    return mc
+
+
+def benchmark_grid(kind: str, size: int, n_robots: int = 10, n_mazes: int = 20, seed: int = 0,
+                   repeats: int = 3) -> dict:
+    # Times the planners and the whole simulation on one generated grid, the planners run on the fully explored
+    # grid, where BFS has to sweep every reachable position and AStar gets the longest searches
+    grid, robots = generate(kind, size, size, n_robots, n_mazes, seed)
+    mc = _controller(grid, robots, explored=True)
+    results = {
+        "bfs": _best_time(lambda: [BFS(r, mc.grid) for r in mc.robots], repeats),
+        "astar": _best_time(lambda: [AStar((r.x, r.y), mc.grid.start, mc.grid) for r in mc.robots], repeats),
+    }
+
+    def assign():
+        mazes = [tuple(m) for m in zip(*(mc.grid.grid == 2).nonzero())]
+        mc.assign_mazes(mazes)
+    results["assign_mazes"] = _best_time(assign, repeats)
+
+    # Whole runs change the grid, so every phase is timed once on a fresh controller
+    mc = _controller(grid, robots, explored=False)
+    results["do_exploration"] = _best_time(mc.do_exploration, 1)
+    results["do_transportation"] = _best_time(mc.do_transportation, 1)
+    results["exploration_steps"] = mc.exploration_steps
+    results["transportation_steps"] = mc.transportation_steps
+    return results
+
+
+def run_suite(sizes=SIZES, kinds=KINDS, **kwargs) -> dict:
+    # Runs the benchmark for every kind and size, results are keyed by "kind/size"
+    return {f"{kind}/{size}": benchmark_grid(kind, size, **kwargs) for kind in kinds for size in sizes}
+
+
+def compare_expansions(kind: str, size: int, n_queries: int = 50, seed: int = 0) -> dict:
+    # Runs AStar and JPS on the same random queries of the fully explored generated grid, returns the expanded
+    # nodes and the wall times of both planners
+    grid, _ = generate(kind, size, size, 0, 0, seed)
+    grid = Grid(grid)
+    grid.explored[:] = True
+    free = np.argwhere(grid.grid > -1)
+    rng = np.random.default_rng(seed)
+    queries = [(tuple(free[a]), tuple(free[b])) for a, b in rng.integers(free.shape[0], size=(n_queries, 2))]
+
+    results = dict()
+    for name, planner in (("astar", AStar), ("jps", JPS)):
+        grid.stats = Stats()
+        lengths = [len(planner(start, goal, grid)) for start, goal in queries]
+        summary = grid.stats.summary()[name]
+        results[f"{name}_expanded"] = summary["expanded"]
+        results[name] = summary["time"]
+        results[f"{name}_length"] = sum(lengths)
+    grid.stats = None
+    return results
+
+
+def save_baseline(results: dict, path: str):
+    # Stores the results as the baseline for later comparisons
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def compare(results: dict, baseline_path: str, tolerance: float = 1.5) -> list[str]:
+    # Compares the results with a stored baseline, returns the descriptions of timings slower than
+    # tolerance times the baseline and of step counts that changed
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+
+    regressions = []
+    for key, measured in results.items():
+        if key not in baseline:
+            continue
+        for name, value in measured.items():
+            base = baseline[key].get(name)
+            if base is None:
+                continue
+            if name.endswith("_steps"):
+                if value != base:
+                    regressions.append(f"{key} {name}: {base} -> {value}")
+            elif value > base * tolerance:
+                regressions.append(f"{key} {name}: {base:.4f}s -> {value:.4f}s")
+    return regressions
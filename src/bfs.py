@@ -1,82 +1,178 @@
 from collections import deque
+from src.path import Path
+import numpy as np
+import time
 
 
 def BFS(robot, grid):
     # Performs Breadth-First Search (BFS) to find a path for the robot
-    grid_seen = (grid.grid > -1) * grid.explored - 1  # Keeps track of seen positions in the grid
-    grid_seen[robot.x, robot.y] = 1  # Marks the starting position as open
-
-    opened = deque()  # Queue to store nodes to be explored
-    # Adds the starting node to the queue with initial exploration level and iteration count
-    opened.append((robot.x, robot.y, 0, 0))
-
-    previous = dict()  # Dictionary to store previous nodes for path reconstruction
-    # Sets the previous node of the starting position to None
-    previous[(robot.x, robot.y)] = None
-
-    if not find_path(grid, grid_seen, opened, previous):
-        # If no path is found, returns an empty list
-        return []
-
-    # Finds the position with the maximum exploration level in the queue
-    x, y, _, _ = max(opened, key=lambda n: n[2])
-    # Reconstructs the path using the previous dictionary
-    return reconstruct_path(previous, (x, y))
-
-
-def find_path(grid, grid_seen, opened, previous):
-    # Expands nodes in the BFS search until convergence or all nodes are explored
-    converged = False
-    while not converged and len(opened) > 0:
-        # Retrieves and removes the leftmost node from the queue
-        node = opened.popleft()
-
-        if expand_node(node, opened, previous, grid_seen, grid):
-            # Convergence occurs if an unexplored position is found
-            converged = True
-
-            _, _, _, iteration = node
-            size = len(opened)
-
-            # Expands nodes in the queue with the same iteration count
-            for i in range(size):
-                node = opened[i]
-                if node[3] > iteration:
-                    break
-                expand_node(node, opened, previous, grid_seen, grid)
-    return converged
-
-
-def expand_node(node, opened, previous, grid_seen, grid):
-    # Expands a node by considering its neighboring positions
-    x, y, _, iteration = node
-    grid_seen[x, y] = 2  # Marks the current position as close
-    found_unexplored = False
-
-    for x_open, y_open in [(x - 1, y), (x, y + 1), (x + 1, y), (x, y - 1)]:
-        # Checks the neighboring positions
-        if grid_seen[x_open, y_open] != 0:
-            continue
-        # Calculates the exploration level of the neighboring position
-        expl_lvl = grid.calculate_exploration_level(x_open, y_open)
-
-        previous[(x_open, y_open)] = (x, y)  # Sets the previous node of the neighboring position
-        # Adds the neighboring position to the queue with updated exploration level and iteration count
-        opened.append((x_open, y_open, expl_lvl, iteration + 1))
-        grid_seen[x_open, y_open] = 1  # Marks the neighboring position as open
-
-        found_unexplored = found_unexplored or expl_lvl > 0  # Updates the flag if an unexplored position is found
-    return found_unexplored
-
-
-def reconstruct_path(previous, goal):
-    # Reconstructs the path from the previous nodes
-    path = list()
-    path.append(goal)
-
-    current = previous[goal]
-    while current is not None:
-        # previous for start will return None
-        path.append(current)
-        current = previous[current]
-    return path[:-1]  # path without start
+    if grid.bfs_engine is None:
+        # The engine and its buffers are created once per grid and reused by every later call
+        grid.bfs_engine = BFSEngine(grid)
+    if grid.stats is None:
+        return grid.bfs_engine.search(robot.x, robot.y)
+
+    start = time.perf_counter()
+    path = grid.bfs_engine.search(robot.x, robot.y)
+    grid.stats.record("bfs", time.perf_counter() - start, grid.bfs_engine.expanded)
+    return path
+
+
+class BFSEngine:
+    # Breadth-First Search over flat indices of the padded grid with preallocated buffers. Instead of clearing
+    # the buffers, every search gets a new generation and a position counts as seen only if it is stamped with it.
+
+    def __init__(self, grid):
+        self.width = grid.padded_grid.shape[1]
+        # Flat views of the padded arrays, they always reflect the current state of the grid
+        self.cells = grid.padded_grid.ravel()
+        self.explored = grid.padded_explored.ravel()
+        self.levels = grid.padded_exploration_level.ravel()
+        # Offsets of the neighbouring positions in the order up, right, down, left
+        self.offsets = (-self.width, 1, self.width, -1)
+
+        self.seen = np.zeros(self.cells.size, dtype=np.int32)  # Generation in which the position was seen
+        self.previous = np.zeros(self.cells.size, dtype=np.int32)  # Previous position for path reconstruction
+        self.queue = np.zeros(self.cells.size, dtype=np.int32)  # Every position is queued at most once per search
+        self.path = np.zeros(self.cells.size, dtype=np.int32)  # Buffer for the path reconstruction
+        self.generation = 0
+        self.expanded = 0  # Nodes expanded by the last search
+
+    def search(self, x: int, y: int) -> Path:
+        # Searches layer by layer until a layer containing a position with unexplored neighbours is found, then
+        # returns the path to the first position in that layer with the maximum exploration level
+        self.generation += 1
+        start = (x + 1) * self.width + (y + 1)
+        self.seen[start] = self.generation
+        self.queue[0] = start
+
+        layer_end = self.find_layer(start)
+        if layer_end is None:
+            # If no path is found, returns an empty path
+            return Path.empty(self.width - 2)
+
+        layer = self.queue[layer_end[0]:layer_end[1]]
+        goal = layer[self.levels[layer].argmax()]
+        return self.reconstruct_path(start, goal)
+
+    def find_layer(self, start: int):
+        # Expands nodes until the first layer with unexplored neighbours is complete,
+        # returns the queue bounds of that layer or None when everything reachable was expanded
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        cells, explored, levels = memoryview(self.cells), memoryview(self.explored), memoryview(self.levels)
+        seen, previous, queue = memoryview(self.seen), memoryview(self.previous), memoryview(self.queue)
+        generation = self.generation
+
+        head, tail = 0, 1
+        layer_end = 1
+        converged = False
+        while head < tail:
+            node = queue[head]
+            head += 1
+            for offset in self.offsets:
+                node_open = node + offset
+                if seen[node_open] == generation or cells[node_open] < 0 or not explored[node_open]:
+                    continue
+                seen[node_open] = generation  # Marks the neighbouring position as seen
+                previous[node_open] = node
+                queue[tail] = node_open
+                tail += 1
+                # Convergence occurs if a position with unexplored neighbours is opened
+                converged = converged or levels[node_open] > 0
+
+            if head == layer_end:
+                # The whole layer was expanded, the queue now holds exactly the next layer
+                if converged:
+                    self.expanded = head
+                    return head, tail
+                layer_end = tail
+        self.expanded = head
+        return None
+
+    def reconstruct_path(self, start: int, goal: int) -> Path:
+        # Reconstructs the path from the previous nodes, without the start position
+        previous, path = memoryview(self.previous), memoryview(self.path)
+        length = 0
+        current = int(goal)
+        while current != start:
+            path[length] = current
+            length += 1
+            current = previous[current]
+        return Path.from_padded(self.path[:length], self.width)
+
+
+class DistanceField:
+    # Breadth-First Search distances and previous positions from a set of root positions over the known part of
+    # the grid. It is built once and then answers distance and path queries without any further search.
+
+    def __init__(self, grid, roots: list):
+        self.width = grid.padded_grid.shape[1]
+        size = grid.padded_grid.size
+        self.distance = np.full(size, -1, dtype=np.int32)  # Distance to the nearest root, -1 if unreachable
+        self.previous = np.full(size, -1, dtype=np.int32)  # Next position towards the nearest root
+        self.build(grid, [(x + 1) * self.width + (y + 1) for x, y in roots])
+
+    @classmethod
+    def from_arrays(cls, distance: np.array, previous: np.array, width: int):
+        # Creates the field from distances and previous positions of an earlier build, e.g. from a snapshot
+        field = cls.__new__(cls)
+        field.width = width
+        field.distance = distance.astype(np.int32)
+        field.previous = previous.astype(np.int32)
+        return field
+
+    def build(self, grid, roots: list):
+        # Expands the known part of the grid from all roots at once
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        cells, explored = memoryview(grid.padded_grid.ravel()), memoryview(grid.padded_explored.ravel())
+        distance, previous = memoryview(self.distance), memoryview(self.previous)
+        offsets = (-self.width, 1, self.width, -1)
+
+        opened = deque()
+        for root in roots:
+            if distance[root] == -1:
+                distance[root] = 0
+                opened.append(root)
+        while len(opened) > 0:
+            node = opened.popleft()
+            dist = distance[node] + 1
+            for offset in offsets:
+                node_open = node + offset
+                if distance[node_open] != -1 or cells[node_open] < 0 or not explored[node_open]:
+                    continue
+                distance[node_open] = dist
+                previous[node_open] = node
+                opened.append(node_open)
+
+    def get_distance(self, x: int, y: int) -> int:
+        # Returns the distance from the given position to the nearest root, -1 if no root is reachable
+        return int(self.distance[(x + 1) * self.width + (y + 1)])
+
+    def path_to_root(self, x: int, y: int) -> Path:
+        # Reads the path from the given position to the nearest root off the previous positions, the path is
+        # ordered the same way as the search paths: the root first and the position after (x, y) last
+        previous = memoryview(self.previous)
+        position = (x + 1) * self.width + (y + 1)
+        path = np.empty(max(self.distance[position], 0), dtype=np.int32)
+        # The distance gives the length, so the path is filled from its end without reversing
+        i = path.size
+        current = previous[position]
+        while current != -1:
+            i -= 1
+            path[i] = current
+            current = previous[current]
+        return Path.from_padded(path, self.width)
+
+    def path_from_root(self, x: int, y: int) -> Path:
+        # Reads the path from the nearest root to the given position, (x, y) first and the position after the
+        # root last, the root itself is left out
+        previous = memoryview(self.previous)
+        position = (x + 1) * self.width + (y + 1)
+        path = np.empty(max(self.distance[position], 0), dtype=np.int32)
+        i = 0
+        current = position
+        while i < path.size:
+            path[i] = current
+            i += 1
+            current = previous[current]
+        return Path.from_padded(path, self.width)
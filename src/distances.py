@@ -0,0 +1,101 @@
+from src.path import Path
+import heapq
+import numpy as np
+
+# Number of BFS sweeps computed together, bounds the memory of the dense distance rows
+SWEEP_CHUNK = 16
+
+
+def known_map_graph(grid):
+    # Builds the sparse graph of the known part of the grid, nodes are the explored passable positions
+    from scipy.sparse import coo_matrix  # scipy is loaded lazily, only when a distance matrix is needed
+
+    passable = ((grid.padded_grid > -1) & (grid.padded_explored > 0)).ravel()
+    width = grid.padded_grid.shape[1]
+
+    # Maps flat positions of the padded grid to graph nodes
+    nodes = np.flatnonzero(passable)
+    node_of = np.full(passable.size, -1, dtype=np.int64)
+    node_of[nodes] = np.arange(nodes.size)
+
+    # Edges to the right and down neighbours, the wall border keeps the shifted indices inside the grid
+    edges_from, edges_to = [], []
+    for offset in (1, width):
+        connected = nodes[passable[nodes + offset]]
+        edges_from.append(node_of[connected])
+        edges_to.append(node_of[connected + offset])
+    edges_from, edges_to = np.concatenate(edges_from), np.concatenate(edges_to)
+
+    graph = coo_matrix((np.ones(edges_from.size), (edges_from, edges_to)), shape=(nodes.size, nodes.size))
+    return graph.tocsr(), node_of
+
+
+def distance_matrix(grid, sources: list, targets: list) -> np.array:
+    # Computes the shortest path distances on the known map between every source and every target position.
+    # One BFS sweep is run per source or per target, whichever is fewer, unreachable pairs get np.inf.
+    from scipy.sparse.csgraph import shortest_path
+
+    graph, node_of = known_map_graph(grid)
+    width = grid.padded_grid.shape[1]
+    source_nodes = np.array([node_of[(x + 1) * width + (y + 1)] for x, y in sources], dtype=np.int64)
+    target_nodes = np.array([node_of[(x + 1) * width + (y + 1)] for x, y in targets], dtype=np.int64)
+
+    transposed = len(targets) < len(sources)
+    if transposed:
+        source_nodes, target_nodes = target_nodes, source_nodes
+
+    distances = np.full((source_nodes.size, target_nodes.size), np.inf)
+    # Positions outside of the known map stay unreachable
+    swept = np.flatnonzero(source_nodes > -1)
+    reachable = target_nodes > -1
+    for i in range(0, swept.size, SWEEP_CHUNK):
+        rows = swept[i:i + SWEEP_CHUNK]
+        sweep = shortest_path(graph, directed=False, unweighted=True, indices=source_nodes[rows])
+        distances[np.ix_(rows, np.flatnonzero(reachable))] = sweep[:, target_nodes[reachable]]
+    return distances.T if transposed else distances
+
+
+def cost_matrix(grid, sources: list, targets: list) -> np.array:
+    # Distance matrix usable by linear_sum_assignment, unreachable pairs cost more than any real path
+    distances = distance_matrix(grid, sources, targets)
+    distances[np.isinf(distances)] = grid.grid.size + 1
+    return distances
+
+
+def assignment(distances: np.array) -> tuple:
+    # Pairs rows and columns of the cost matrix with the minimum total cost, returns the row and column indices
+    from scipy.optimize import linear_sum_assignment  # scipy is loaded lazily, only when mazes are assigned
+
+    return linear_sum_assignment(distances)
+
+
+class MazeIndex:
+    # Remaining mazes ordered by their shortest path distance to the start. Robots are reassigned only after
+    # dropping a maze at the start, so the distance from the robot is the distance from the start and the nearest
+    # maze is on top of a heap. With farthest the farthest maze is handed out first instead, which keeps the long
+    # trips from piling up at the end of the transportation. Mazes at the same distance keep their given order.
+
+    def __init__(self, depot_field, mazes: list, farthest: bool = False):
+        self.depot_field = depot_field
+        self.farthest = farthest
+        self.opened = list()  # Binary heap of (distance, order, x, y) entries, distances are negated with farthest
+        for order, (x, y) in enumerate(mazes):
+            distance = depot_field.get_distance(x, y)
+            if distance > 0:
+                # Mazes unreachable on the known map are left out
+                heapq.heappush(self.opened, (-distance if farthest else distance, order, int(x), int(y)))
+
+    def __len__(self):
+        return len(self.opened)
+
+    def mazes(self) -> list:
+        # Returns the remaining mazes in the order they are handed out
+        return [(x, y) for _, _, x, y in sorted(self.opened)]
+
+    def pop(self):
+        # Removes the next maze from the index, returns it with the path from the start to it,
+        # or (None, empty path) if no reachable maze is left
+        if len(self.opened) == 0:
+            return None, Path.empty(self.depot_field.width - 2)
+        _, _, x, y = heapq.heappop(self.opened)
+        return (x, y), self.depot_field.path_from_root(x, y)
@@ -0,0 +1,129 @@
+from src.bfs import BFS
+import numpy as np
+import time
+
+# The field is built only while there are at most this many frontier positions per robot
+FRONTIER_PER_ROBOT = 4
+
+
+class FrontierField:
+    # Distance field to the nearest frontier position (explored position with unexplored neighbours), shared
+    # by all robots. It is built by one multi-source BFS from all frontier positions over the padded grid. A robot
+    # next to a frontier position steps into it without the field, the others descend the field even when it is
+    # out of date, just like a robot follows its BFS path until the goal is explored. The field is built again only
+    # when it no longer leads some robot anywhere, so one build serves many rounds and robots. While the frontier is
+    # wide, a search from all of it expands more than the searches of the robots, so robots plan their own BFS paths.
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.width = grid.padded_grid.shape[1]
+        # Flat views of the padded arrays, they always reflect the current state of the grid
+        self.cells = grid.padded_grid.ravel()
+        self.explored = grid.padded_explored.ravel()
+        self.levels = grid.padded_exploration_level.ravel()
+        # Offsets of the neighbouring positions in the order up, right, down, left
+        self.offsets = (-self.width, 1, self.width, -1)
+
+        self.distance = np.zeros(self.cells.size, dtype=np.int32)  # Distance to the nearest frontier position
+        self.seen = np.zeros(self.cells.size, dtype=np.int32)  # Generation in which the distance was set
+        self.queue = np.zeros(self.cells.size, dtype=np.int32)  # Every position is queued at most once per build
+        self.generation = 0
+        self.built_for = None  # Value of grid.explored_changes the field was built for
+        self.robots = list()  # Robots whose positions a build has to reach
+
+    def update(self, robots: list):
+        # Sets the robots descending the field, a build stops as soon as all of their positions have a distance
+        self.robots = robots
+
+    def move(self, robot) -> bool:
+        # Moves the robot one step towards the frontier, returns False if there is nothing to explore from its
+        # position. A robot with a path from its own search follows it until its goal is explored.
+        if robot.needs_replan(self.grid):
+            robot.path = []
+            node = (robot.x + 1) * self.width + (robot.y + 1)
+            best = self.frontier_neighbour(node)
+            if best is None:
+                best = self.descend(node)
+            if best is None and (self.built_for != self.grid.explored_changes or self.seen[node] != self.generation):
+                passable = (self.cells > -1) & (self.explored > 0)
+                sources = np.flatnonzero(passable & (self.levels > 0)).astype(np.int32)
+                if sources.size > FRONTIER_PER_ROBOT * len(self.robots):
+                    # Searching from a wide frontier expands more than the robot's own search
+                    robot.path = BFS(robot, self.grid)
+                    if self.grid.stats is not None:
+                        self.grid.stats.count("exploration_replan")
+                else:
+                    self.build(sources)
+                    best = self.descend(node)
+            if best is not None:
+                x, y = divmod(best, self.width)
+                robot.x, robot.y = x - 1, y - 1
+                return True
+        if len(robot.path) == 0:
+            return False
+        robot.x, robot.y = robot.path.pop()
+        return True
+
+    def build(self, sources: np.array):
+        # Builds the field from the frontier positions
+        time_start = time.perf_counter() if self.grid.stats is not None else None
+        self.built_for = self.grid.explored_changes
+        self.generation += 1
+        self.seen[sources] = self.generation
+        self.distance[sources] = 0
+        self.queue[:sources.size] = sources
+
+        targets = {(r.x + 1) * self.width + (r.y + 1) for r in self.robots}
+        self.expand(sources.size, targets)
+        if time_start is not None:
+            self.grid.stats.record("frontier_field", time.perf_counter() - time_start)
+
+    def expand(self, tail: int, targets: set):
+        # Expands the queue layer by layer until all targets have their distance or everything reachable is seen
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        cells, explored = memoryview(self.cells), memoryview(self.explored)
+        distance, seen, queue = memoryview(self.distance), memoryview(self.seen), memoryview(self.queue)
+        generation = self.generation
+
+        remaining = len(targets.difference(queue[:tail].tolist()))
+        head = 0
+        while head < tail and remaining > 0:
+            node = queue[head]
+            head += 1
+            dist = distance[node] + 1
+            for offset in self.offsets:
+                node_open = node + offset
+                if seen[node_open] == generation or cells[node_open] < 0 or not explored[node_open]:
+                    continue
+                seen[node_open] = generation
+                distance[node_open] = dist
+                queue[tail] = node_open
+                tail += 1
+                if node_open in targets:
+                    remaining -= 1
+
+    def frontier_neighbour(self, node: int):
+        # Returns the neighbouring frontier position with the highest exploration level, None if there is none
+        best, best_level = None, 0
+        for offset in self.offsets:
+            node_next = node + offset
+            level = int(self.levels[node_next])
+            if level > best_level and self.cells[node_next] > -1 and self.explored[node_next]:
+                best, best_level = node_next, level
+        return best
+
+    def descend(self, node: int):
+        # Returns the neighbouring position one step closer to the frontier position the field was built for,
+        # None if the field does not reach the position or the robot already arrived there. Among equally close
+        # neighbours the one with the highest exploration level is taken, the first in offset order on ties.
+        if self.seen[node] != self.generation or self.distance[node] == 0:
+            return None
+        dist = self.distance[node] - 1
+        best, best_level = None, -1
+        for offset in self.offsets:
+            node_next = node + offset
+            if self.seen[node_next] == self.generation and self.distance[node_next] == dist:
+                level = int(self.levels[node_next])
+                if level > best_level:
+                    best, best_level = node_next, level
+        return best
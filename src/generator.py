@@ -0,0 +1,111 @@
+from src.gridfile import write_text_cells
+import numpy as np
+import random
+
+
+def backtracker_maze(height: int, width: int, corridor: int = 1, braid: float = 0.0, seed: int = None) -> np.array:
+    # Generates a labyrinth with the recursive backtracker, corridors and walls between them are corridor and one
+    # position wide, braid is the fraction of remaining inner walls that are removed to create loops
+    rng = random.Random(seed)
+    step = corridor + 1
+    rows, cols = (height - 1) // step, (width - 1) // step
+
+    # Passages carved from each cell to its east and south neighbour
+    east = np.zeros((rows, cols), dtype=bool)
+    south = np.zeros((rows, cols), dtype=bool)
+    visited = np.zeros((rows, cols), dtype=bool)
+
+    # Depth first search with an explicit stack, the recursion would be too deep for large labyrinths
+    stack = [(rng.randrange(rows), rng.randrange(cols))]
+    visited[stack[0]] = True
+    while len(stack) > 0:
+        i, j = stack[-1]
+        neighbours = [(i_n, j_n) for i_n, j_n in [(i - 1, j), (i, j + 1), (i + 1, j), (i, j - 1)]
+                      if 0 <= i_n < rows and 0 <= j_n < cols and not visited[i_n, j_n]]
+        if len(neighbours) == 0:
+            stack.pop()
+            continue
+        i_n, j_n = rng.choice(neighbours)
+        if i_n == i:
+            east[i, min(j, j_n)] = True
+        else:
+            south[min(i, i_n), j] = True
+        visited[i_n, j_n] = True
+        stack.append((i_n, j_n))
+
+    if braid > 0:
+        # Removes random inner walls, the last column and row have no east and south neighbours
+        braid_rng = np.random.default_rng(seed)
+        east[:, :-1] |= braid_rng.random((rows, cols - 1)) < braid
+        south[:-1, :] |= braid_rng.random((rows - 1, cols)) < braid
+
+    # Paints the cells and the carved passages
+    grid = np.full((height, width), -1, dtype=np.int8)
+    cell_x, cell_y = np.meshgrid(np.arange(rows) * step + 1, np.arange(cols) * step + 1, indexing="ij")
+    for d_x in range(corridor):
+        for d_y in range(corridor):
+            grid[cell_x + d_x, cell_y + d_y] = 0
+        grid[cell_x[east] + d_x, cell_y[east] + corridor] = 0
+        grid[cell_x[south] + corridor, cell_y[south] + d_x] = 0
+    return grid
+
+
+def open_rooms(height: int, width: int, room: int = 20, door: int = 2, seed: int = None) -> np.array:
+    # Generates open space split into rooms of roughly room x room positions, every wall between two rooms
+    # has one door of the given width
+    rng = np.random.default_rng(seed)
+    grid = np.full((height, width), -1, dtype=np.int8)
+    grid[1:-1, 1:-1] = 0
+
+    wall_rows = np.arange(room + 1, height - 1, room + 1)
+    wall_cols = np.arange(room + 1, width - 1, room + 1)
+    grid[wall_rows, 1:-1] = -1
+    grid[1:-1, wall_cols] = -1
+
+    # Doors are placed in every wall segment between two crossings
+    row_bounds = np.concatenate([[0], wall_rows, [height - 1]])
+    col_bounds = np.concatenate([[0], wall_cols, [width - 1]])
+    for r in wall_rows:
+        for start, end in zip(col_bounds[:-1], col_bounds[1:]):
+            if end - start - 1 > door:
+                d = rng.integers(start + 1, end - door)
+                grid[r, d:d + door] = 0
+    for c in wall_cols:
+        for start, end in zip(row_bounds[:-1], row_bounds[1:]):
+            if end - start - 1 > door:
+                d = rng.integers(start + 1, end - door)
+                grid[d:d + door, c] = 0
+    return grid
+
+
+def place_items(grid: np.array, n_robots: int, n_mazes: int, seed: int = None) -> list[tuple]:
+    # Places the start and the mazes on distinct random free positions of the grid and returns the positions
+    # of the robots, which are placed next to each other along the free positions nearest to the top left corner
+    rng = np.random.default_rng(seed)
+    free = np.flatnonzero(grid == 0)
+    if free.size < 1 + n_mazes + n_robots:
+        raise ValueError(f"Not enough free positions for {n_robots} robots and {n_mazes} mazes!")
+
+    robots = free[:n_robots]
+    items = rng.choice(free[n_robots:], size=1 + n_mazes, replace=False)
+    grid.flat[items[0]] = 1
+    grid.flat[items[1:]] = 2
+    return [(int(p // grid.shape[1]), int(p % grid.shape[1])) for p in robots]
+
+
+def write_grid(path: str, grid: np.array, robots: list[tuple]):
+    # Writes the grid with the robots in the text format read by load_from_file
+    write_text_cells(path, grid, robots)
+
+
+def generate(kind: str, height: int, width: int, n_robots: int, n_mazes: int, seed: int = None, **kwargs):
+    # Generates a grid of the given kind ("maze" or "rooms") with the start, mazes and robots,
+    # kwargs are passed to the generator of the kind
+    if kind == "maze":
+        grid = backtracker_maze(height, width, seed=seed, **kwargs)
+    elif kind == "rooms":
+        grid = open_rooms(height, width, seed=seed, **kwargs)
+    else:
+        raise ValueError(f"Unknown grid kind {kind}!")
+    robots = place_items(grid, n_robots, n_mazes, seed)
+    return grid, robots
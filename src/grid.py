@@ -1,56 +1,111 @@
+from src.robot import RobotFleet
 import numpy as np
+import sys
 
 
 class Grid:
-    BACK_ENCODING = {0: '.', -1: '#', 1: 'S', 2: 'B'}
+    # Characters of the grid values in text frames and text grid files, indexed by value + 1
+    CHARACTERS = np.frombuffer(b"#.SB", dtype=np.uint8)
 
-    def __init__(self, grid: np.array):
-        self.grid = grid
+    def __init__(self, grid: np.array, padded: bool = False):
+        # The grid is stored with a one cell wide wall border, so neighbours of any position can be read without
+        # bounds checks, grid, explored and exploration_level are views of the padded arrays without the border.
+        # An already padded grid (padded=True) is used as it is, without copying.
+        self.padded_grid = grid if padded else np.pad(grid, 1, constant_values=-1)
+        self.grid = self.padded_grid[1:-1, 1:-1]
         self.n_mazes = (self.grid == 2).sum()  # Counts the number of mazes (value 2) in the grid
 
         # Finds the start position (value 1) in the grid
         start_index = (self.grid == 1).argmax()
         self.start = (start_index // self.grid.shape[1], start_index % self.grid.shape[1])
 
-        # Initializes the explored array with the same shape as the grid
-        self.explored = np.full_like(grid, False)
+        # Initializes the explored array with the same shape as the grid, the border counts as explored
+        self.padded_explored = np.full(self.padded_grid.shape, True, dtype=self.padded_grid.dtype)
+        self.explored = self.padded_explored[1:-1, 1:-1]
+        self.explored[:] = False
         # Marks the corner points of the grid as explored
         self.explored[[0, 0, -1, -1], [0, -1, 0, -1]] = True
+        # Number of unexplored positions adjacent to each position, kept up to date by mark_explored
+        self.padded_exploration_level = np.zeros(self.padded_grid.shape, dtype=np.int32)
+        self.exploration_level = self.padded_exploration_level[1:-1, 1:-1]
+        self.exploration_level[:] = self.recalculate_exploration_levels()
+        self.explored_changes = 0  # Number of positions marked as explored by mark_explored
+
+        self.bfs_engine = None  # Reusable BFS buffers, created by the first BFS call
+        self.shared_memory = None  # Shared memory blocks holding the arrays (see attach)
+        self.stats = None  # Profiling counters and timers (src.stats.Stats), None disables profiling
+
+    def attach(self, padded_grid: np.array, padded_explored: np.array, padded_exploration_level: np.array,
+               shared_memory: list = None):
+        # Continues on the given padded arrays of the same shapes, e.g. in shared memory, their content is used as
+        # it is. Planners keeping views of the arrays have to be created only after this. The shared memory blocks
+        # of the arrays are kept open as long as the grid exists.
+        self.shared_memory = shared_memory
+        self.padded_grid = padded_grid
+        self.grid = self.padded_grid[1:-1, 1:-1]
+        self.padded_explored = padded_explored
+        self.explored = self.padded_explored[1:-1, 1:-1]
+        self.padded_exploration_level = padded_exploration_level
+        self.exploration_level = self.padded_exploration_level[1:-1, 1:-1]
+        self.bfs_engine = None
 
     def print(self, robots: list = None, only_explored: bool = False):
-        # Creates a grid_print list based on the conditions
+        # Prints the grid followed by an empty line, the whole frame is written at once
+        sys.stdout.write(self.text_frame(robots, only_explored).tobytes().decode("ascii") + "\n")
+
+    def text_frame(self, robots: list = None, only_explored: bool = False) -> np.array:
+        # Renders the grid as an array of characters with a newline at the end of each row. Grid values are
+        # translated by one lookup in CHARACTERS, unexplored positions (with only_explored) become x and robots R.
+        frame = np.empty((self.grid.shape[0], self.grid.shape[1] + 1), dtype=np.uint8)
+        frame[:, :-1] = self.CHARACTERS[self.grid.astype(np.int64) + 1]
+        frame[:, -1] = ord("\n")
         if only_explored:
-            grid_print = [[self.BACK_ENCODING[self.grid[i, j]] if self.explored[i, j] else 'x'
-                           for j in range(self.grid.shape[1])]
-                          for i in range(self.grid.shape[0])]
-        else:
-            grid_print = [[self.BACK_ENCODING[self.grid[i, j]]
-                           for j in range(self.grid.shape[1])]
-                          for i in range(self.grid.shape[0])]
-        # Updates the grid_print with robot positions
-        if robots is not None:
+            frame[:, :-1][self.explored == 0] = ord("x")
+        if isinstance(robots, RobotFleet):
+            frame[robots.positions()] = ord("R")
+        elif robots is not None:
             for rob in robots:
-                grid_print[rob.x][rob.y] = 'R'
-        # Prints each line of the grid
-        for line in grid_print:
-            print(''.join(line))
-        print()
-        return
+                frame[rob.x, rob.y] = ord("R")
+        return frame
 
     def calculate_exploration_level(self, x: int, y: int) -> int:
-        # Calculates the number of unexplored positions adjacent to the given (x, y) position
-        pos_x, pos_y = [], []
-
-        # Checks the adjacent positions in the grid
-        for i in [1, -1]:
-            if 0 <= x + i < self.grid.shape[0]:
-                pos_x.append(x + i)
-                pos_y.append(y)
-            if 0 <= y + i < self.grid.shape[1]:
-                pos_x.append(x)
-                pos_y.append(y + i)
-        # Returns the number of unexplored positions
-        return (1 - self.explored[pos_x, pos_y]).sum()
+        # Returns the number of unexplored positions adjacent to the given (x, y) position
+        if self.stats is not None:
+            self.stats.count("calculate_exploration_level")
+        return self.exploration_level[x, y]
+
+    def recalculate_exploration_levels(self) -> np.array:
+        # Recomputes the exploration level of every position at once from the explored array
+        unexplored = (1 - self.padded_explored).astype(np.int32)
+        return unexplored[:-2, 1:-1] + unexplored[2:, 1:-1] + unexplored[1:-1, :-2] + unexplored[1:-1, 2:]
+
+    def mark_explored(self, x: int, y: int):
+        # Marks the given (x, y) position as explored and updates the exploration level of its neighbours
+        if self.explored[x, y]:
+            return
+        self.explored[x, y] = True
+        self.explored_changes += 1
+        # Neighbours in the padded coordinates, the border levels are never read
+        x, y = x + 1, y + 1
+        self.padded_exploration_level[x - 1, y] -= 1
+        self.padded_exploration_level[x + 1, y] -= 1
+        self.padded_exploration_level[x, y - 1] -= 1
+        self.padded_exploration_level[x, y + 1] -= 1
+
+    def mark_explored_many(self, x: np.array, y: np.array):
+        # Marks all given positions as explored at once, positions outside the grid fall on the explored border
+        width = self.padded_grid.shape[1]
+        positions = np.unique((x + 1) * width + (y + 1))
+        explored = self.padded_explored.reshape(-1)
+        positions = positions[explored[positions] == 0]
+        if positions.size == 0:
+            return
+        explored[positions] = True
+        self.explored_changes += positions.size
+        # Every newly explored position lowers the exploration level of its four neighbours
+        levels = self.padded_exploration_level.reshape(-1)
+        for offset in (-width, 1, width, -1):
+            np.subtract.at(levels, positions + offset, 1)
 
     def validate_move(self, x, y):
         # Checks if the move to the given (x, y) position is valid (not a wall)
@@ -0,0 +1,108 @@
+from src.grid import Grid
+from src.robot import Robot
+import numpy as np
+import struct
+
+ENCODING = {
+    '.': 0,   # Nothing
+    ' ': 0,   # Nothing
+    '#': -1,  # Wall
+    'S': 1,   # Start place
+    'B': 2    # Maze
+}
+
+# Maps the bytes of a text grid to grid values, robots stand on free positions and unknown bytes are marked
+UNKNOWN = -128
+LOOKUP = np.full(256, UNKNOWN, dtype=np.int8)
+for _ch, _value in ENCODING.items():
+    LOOKUP[ord(_ch)] = _value
+LOOKUP[ord('R')] = 0
+
+# Binary grid: header, robot positions as int32 pairs and the padded int8 grid starting at a multiple of ALIGNMENT
+BINARY_EXTENSION = ".mzg"
+MAGIC = b"MAZEGRID"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIiiI")  # magic, version, height, width, start x, start y, number of robots
+ALIGNMENT = 64
+
+
+def read_grid_file(path: str):
+    # Reads the grid and the robots from a text or binary grid file, chosen by the extension
+    if path.endswith(BINARY_EXTENSION):
+        return read_binary_grid(path)
+    return read_text_grid(path)
+
+
+def read_text_grid(path: str):
+    # Reads the grid and the robots from a text file, the characters are translated by one lookup in LOOKUP
+    with open(path, "rb") as file:
+        lines = [line.strip() for line in file.read().splitlines()]
+    # Skips empty lines at the end of the file
+    while len(lines) > 0 and len(lines[-1]) == 0:
+        lines.pop()
+    width = len(lines[0]) if len(lines) > 0 else 0
+    if any(len(line) != width for line in lines):
+        raise ValueError(f"Lines of the grid in {path} differ in length!")
+
+    raw = np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(len(lines), width)
+    padded = np.full((len(lines) + 2, width + 2), -1, dtype=np.int8)
+    padded[1:-1, 1:-1] = LOOKUP[raw]
+    if (padded == UNKNOWN).any():
+        x, y = np.argwhere(padded == UNKNOWN)[0] - 1
+        raise ValueError(f"Unknown character {chr(raw[x, y])!r} in position {x}, {y} of {path}!")
+
+    robots = [Robot(int(x), int(y)) for x, y in np.argwhere(raw == ord('R'))]
+    return Grid(padded, padded=True), robots
+
+
+def read_binary_grid(path: str):
+    # Reads the grid and the robots from a binary file, the grid is memory-mapped copy-on-write, so the file
+    # is never modified and only the pages touched by the simulation are read
+    with open(path, "rb") as file:
+        magic, version, height, width, _, _, n_robots = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a binary grid file of version {VERSION}!")
+        robots = np.frombuffer(file.read(8 * n_robots), dtype="<i4").reshape(n_robots, 2)
+
+    padded = np.memmap(path, dtype=np.int8, mode="c", offset=_cells_offset(n_robots), shape=(height + 2, width + 2))
+    return Grid(padded, padded=True), [Robot(int(x), int(y)) for x, y in robots]
+
+
+def write_binary_grid(path: str, grid: Grid, robots: list[Robot]):
+    # Writes the grid and the robots to a binary file
+    height, width = grid.grid.shape
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, height, width, int(grid.start[0]), int(grid.start[1]), len(robots)))
+        file.write(np.array([(r.x, r.y) for r in robots], dtype="<i4").reshape(-1, 2).tobytes())
+        file.write(b"\0" * (_cells_offset(len(robots)) - file.tell()))
+        file.write(np.ascontiguousarray(grid.padded_grid, dtype=np.int8).tobytes())
+
+
+def write_text_grid(path: str, grid: Grid, robots: list[Robot]):
+    # Writes the grid and the robots to a text file
+    write_text_cells(path, grid.grid, [(r.x, r.y) for r in robots])
+
+
+def write_text_cells(path: str, cells: np.array, robots: list[tuple]):
+    # Writes an array of grid values and (x, y) robot positions to a text file
+    characters = Grid.CHARACTERS[cells.astype(np.int64) + 1]
+    for x, y in robots:
+        characters[x, y] = ord("R")
+    lines = np.concatenate([characters, np.full((cells.shape[0], 1), ord("\n"), dtype=np.uint8)], axis=1)
+    with open(path, "wb") as file:
+        file.write(lines.tobytes())
+
+
+def convert_grid_file(source: str, target: str):
+    # Converts a grid file between the text and binary formats, the formats are chosen by the extensions
+    grid, robots = read_grid_file(source)
+    if target.endswith(BINARY_EXTENSION):
+        write_binary_grid(target, grid, robots)
+    else:
+        write_text_grid(target, grid, robots)
+
+
+def _cells_offset(n_robots: int) -> int:
+    # Offset of the grid in a binary file, aligned so the memory map starts on a clean boundary
+    end = HEADER.size + 8 * n_robots
+    return (end + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
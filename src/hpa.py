@@ -0,0 +1,185 @@
+from collections import deque
+from src.path import Path
+import heapq
+import numpy as np
+
+# Default width and height of the clusters
+CLUSTER_SIZE = 16
+
+
+class HierarchicalPlanner:
+    # Hierarchical path-finding (HPA*) on the known part of the grid. The grid is split into square clusters, cells
+    # where two clusters touch become entrances and the distances between the entrances of every cluster are
+    # precomputed, so a query searches the small abstract graph of entrances and only the segments of the found
+    # abstract path are refined into cells. Paths are near optimal, the known map must not change after building.
+
+    def __init__(self, grid, cluster_size: int = CLUSTER_SIZE):
+        self.height, self.width = grid.grid.shape
+        self.cluster_size = cluster_size
+        # Flat list of the explored passable positions, read by the cluster searches
+        self.passable = ((grid.grid > -1) & (grid.explored > 0)).ravel().tolist()
+        self.graph = dict()  # Abstract graph, node -> {neighbouring node: cost}
+        self.cluster_nodes = dict()  # Cluster -> entrance nodes inside it
+
+        self.build_entrances()
+        for nodes in self.cluster_nodes.values():
+            self.connect_cluster(nodes)
+
+    def cluster_of(self, node: int) -> tuple:
+        # Returns the (row, column) of the cluster containing the flat position
+        x, y = divmod(node, self.width)
+        return x // self.cluster_size, y // self.cluster_size
+
+    def add_edge(self, a: int, b: int, cost: int):
+        # Adds an undirected edge to the abstract graph
+        self.graph.setdefault(a, dict())[b] = cost
+        self.graph.setdefault(b, dict())[a] = cost
+
+    def add_node(self, node: int):
+        # Registers an entrance node in its cluster
+        nodes = self.cluster_nodes.setdefault(self.cluster_of(node), list())
+        if node not in nodes:
+            nodes.append(node)
+
+    def build_entrances(self):
+        # Finds the runs of positions passable on both sides of every cluster border, each run gets one transition
+        # in its middle, runs of six and more positions get transitions at both ends
+        passable = np.array(self.passable, dtype=bool).reshape(self.height, self.width)
+        size = self.cluster_size
+        # Borders between cluster rows (offset across the border is width) and cluster columns (offset is 1)
+        for border in range(size, self.height, size):
+            self.add_transitions(passable[border - 1, :] & passable[border, :], (border - 1) * self.width, 1,
+                                 self.width)
+        for border in range(size, self.width, size):
+            self.add_transitions(passable[:, border - 1] & passable[:, border], border - 1, self.width, 1)
+
+    def add_transitions(self, open_line: np.array, first: int, step: int, across: int):
+        # Adds transitions along one border line, first is the flat position of the first cell on the near side,
+        # step moves along the border and across moves to the far side
+        size = self.cluster_size
+        for segment in range(0, open_line.size, size):
+            line = open_line[segment:segment + size]
+            # Bounds of the runs of consecutive open positions
+            edges = np.diff(np.concatenate([[0], line.astype(np.int8), [0]]))
+            for run_start, run_end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+                if run_end - run_start >= 6:
+                    positions = [run_start, run_end - 1]
+                else:
+                    positions = [(run_start + run_end - 1) // 2]
+                for position in positions:
+                    near = first + (segment + int(position)) * step
+                    self.add_node(near)
+                    self.add_node(near + across)
+                    self.add_edge(near, near + across, 1)
+
+    def connect_cluster(self, nodes: list):
+        # Precomputes the distances between all entrances of one cluster
+        for i, node in enumerate(nodes):
+            distance, _ = self.cluster_search(node)
+            for other in nodes[i + 1:]:
+                if other in distance:
+                    self.add_edge(node, other, distance[other])
+
+    def cluster_search(self, source: int, goal: int = None):
+        # Breadth-First Search from the source restricted to its cluster, stops early when the goal is found,
+        # returns the distances and previous positions of the seen positions
+        size, width = self.cluster_size, self.width
+        row, col = self.cluster_of(source)
+        x_min, x_max = row * size, min((row + 1) * size, self.height)
+        y_min, y_max = col * size, min((col + 1) * size, self.width)
+
+        distance = {source: 0}
+        previous = {source: None}
+        opened = deque([source])
+        while len(opened) > 0:
+            node = opened.popleft()
+            if node == goal:
+                break
+            x, y = divmod(node, width)
+            for x_open, y_open in [(x - 1, y), (x, y + 1), (x + 1, y), (x, y - 1)]:
+                node_open = x_open * width + y_open
+                if not (x_min <= x_open < x_max and y_min <= y_open < y_max) or node_open in distance \
+                        or not self.passable[node_open]:
+                    continue
+                distance[node_open] = distance[node] + 1
+                previous[node_open] = node
+                opened.append(node_open)
+        return distance, previous
+
+    def find_path(self, start: tuple, goal: tuple) -> Path:
+        # Finds a path from start to goal, ordered like AStar paths, empty if goal is unreachable
+        start = int(start[0]) * self.width + int(start[1])
+        goal = int(goal[0]) * self.width + int(goal[1])
+        if start == goal or not self.passable[start] or not self.passable[goal]:
+            return Path.empty(self.width)
+
+        # Temporary edges of the start and the goal to the entrances of their clusters
+        start_distance, _ = self.cluster_search(start)
+        start_edges = {n: start_distance[n] for n in self.cluster_nodes.get(self.cluster_of(start), [])
+                       if n in start_distance}
+        if goal in start_distance:
+            start_edges[goal] = start_distance[goal]
+        # A start on an entrance also keeps its edges leading out of the cluster
+        for node, cost in self.graph.get(start, {}).items():
+            start_edges[node] = min(cost, start_edges.get(node, cost))
+        goal_distance, _ = self.cluster_search(goal)
+        goal_edges = {n: goal_distance[n] for n in self.cluster_nodes.get(self.cluster_of(goal), [])
+                      if n in goal_distance}
+
+        abstract_path = self.abstract_search(start, goal, start_edges, goal_edges)
+        if abstract_path is None:
+            return Path.empty(self.width)
+        return self.refine(abstract_path)
+
+    def abstract_search(self, start: int, goal: int, start_edges: dict, goal_edges: dict):
+        # A* over the abstract graph extended by the start and goal edges, returns the list of abstract nodes
+        goal_x, goal_y = divmod(goal, self.width)
+
+        def heuristic(node):
+            x, y = divmod(node, self.width)
+            return abs(goal_x - x) + abs(goal_y - y)
+
+        distance = {start: 0}
+        previous = {start: None}
+        opened = [(heuristic(start), start)]
+        closed = set()
+        while len(opened) > 0:
+            _, node = heapq.heappop(opened)
+            if node in closed:
+                continue
+            if node == goal:
+                path = list()
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path[::-1]
+            closed.add(node)
+
+            edges = start_edges if node == start else self.graph.get(node, {})
+            neighbours = list(edges.items())
+            if node in goal_edges:
+                neighbours.append((goal, goal_edges[node]))
+            for node_open, cost in neighbours:
+                dist = distance[node] + cost
+                if node_open not in distance or dist < distance[node_open]:
+                    distance[node_open] = dist
+                    previous[node_open] = node
+                    heapq.heappush(opened, (dist + heuristic(node_open), node_open))
+        return None
+
+    def refine(self, abstract_path: list) -> Path:
+        # Expands consecutive abstract nodes into cells, nodes of different clusters are neighbouring cells
+        cells = list()
+        for a, b in zip(abstract_path[:-1], abstract_path[1:]):
+            if self.cluster_of(a) != self.cluster_of(b):
+                cells.append(b)
+                continue
+            _, previous = self.cluster_search(a, b)
+            segment = list()
+            node = b
+            while node != a:
+                segment.append(node)
+                node = previous[node]
+            cells.extend(reversed(segment))
+        # Paths are ordered from the goal to the first step
+        return Path(np.array(cells[::-1], dtype=np.int32), self.width)
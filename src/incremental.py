@@ -0,0 +1,159 @@
+from src.bfs import BFSEngine
+from src.path import Path
+import numpy as np
+
+# Bound of the positions from which no frontier position can ever be reached
+UNREACHABLE = np.iinfo(np.int32).max // 2
+
+
+class IncrementalBFS(BFSEngine):
+    # BFS engine giving the same paths as BFSEngine while reusing the work of earlier searches. It keeps a lower
+    # bound of the distance of every known position to the nearest frontier position (known position with
+    # unexplored neighbours). Exploring only removes frontier positions that were known before and adds new ones
+    # among the newly known positions, and a path leaving the positions known before has to pass one of their
+    # frontier positions first. So distances to the frontier never shrink, bounds stay valid while the robots
+    # explore, and positions known only since get the bound 0.
+    #
+    # A search expands the layers of BFS as usual, but leaves out the positions whose layer plus bound exceeds a
+    # limit. Every shortest path from the robot to its nearest frontier position stays inside, and the positions
+    # on these paths keep their order in the queue, so the first position with the highest level in the first
+    # layer with frontier positions is the same as in BFS. The limit starts at the bound of the robot and is raised
+    # until a frontier layer is found. Like the heuristic of Adaptive A*, every search raises the bounds of the
+    # positions it expanded to what it learned about them, so the bounds are repaired where the robots search. They
+    # are built from scratch again once the searches cut short by a low limit expanded as many positions as that.
+    # Robots whose bound is at most 1 run plain BFS, so open maps with the frontier all around cost no more.
+
+    def __init__(self, grid):
+        super().__init__(grid)
+        self.bound = np.zeros(self.cells.size, dtype=np.int32)  # Lower bound of the distance to the frontier
+        self.layer_ends = list()  # Queue index after each layer of the last search
+        self.built_size = 0  # Number of positions the last build expanded
+        self.wasted = None  # Positions expanded by searches cut short since the last build, None forces a build
+
+    def search(self, x: int, y: int) -> Path:
+        # Searches with rising limits until a layer with frontier positions is found and returns the same path as
+        # BFSEngine.search
+        if self.wasted is None or self.wasted > self.built_size:
+            self.build()
+        start = (x + 1) * self.width + (y + 1)
+        if self.bound[start] <= 1:
+            # The frontier may be next to the robot, where plain BFS is cheapest and the bounds learn nothing
+            return super().search(x, y)
+        first = int(self.bound[start])
+        limit = first
+        expanded = 0
+        while limit < UNREACHABLE:
+            self.generation += 1
+            self.seen[start] = self.generation
+            self.queue[0] = start
+            layer_end, pruned = self.find_bounded_layer(start, limit)
+            expanded += self.expanded
+            if layer_end is not None:
+                self.expanded = expanded
+                self.learn(len(self.layer_ends) - 1)
+                layer = self.queue[layer_end[0]:layer_end[1]]
+                goal = layer[self.levels[layer].argmax()]
+                return self.reconstruct_path(start, goal)
+            self.wasted += self.expanded
+            if pruned >= UNREACHABLE:
+                # Everything reachable was expanded without finding the frontier, it will never be found from here
+                self.bound[self.queue[:self.expanded]] = UNREACHABLE
+                break
+            # The frontier is at least as far as the nearest position left out. The next limit reaches it and at
+            # least doubles the slack above the first one, so a weak bound costs only a few searches.
+            self.learn(pruned)
+            limit = max(pruned, first + 2 * (limit - first))
+        self.expanded = expanded
+        return Path.empty(self.width - 2)
+
+    def find_bounded_layer(self, start: int, limit: int):
+        # Expands nodes like BFSEngine.find_layer, but leaves out the positions whose layer plus bound exceeds
+        # the limit. Returns the queue bounds of the first layer with unexplored neighbours, or None, and the
+        # smallest layer plus bound of the left out positions.
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        cells, explored, levels = memoryview(self.cells), memoryview(self.explored), memoryview(self.levels)
+        seen, previous, queue = memoryview(self.seen), memoryview(self.previous), memoryview(self.queue)
+        bound = memoryview(self.bound)
+        generation = self.generation
+        self.layer_ends = layer_ends = [1]
+
+        head, tail = 0, 1
+        layer_end = 1
+        dist = 1  # Layer of the opened positions
+        pruned = UNREACHABLE
+        converged = False
+        while head < tail:
+            node = queue[head]
+            head += 1
+            for offset in self.offsets:
+                node_open = node + offset
+                if seen[node_open] == generation or cells[node_open] < 0 or not explored[node_open]:
+                    continue
+                estimate = dist + bound[node_open]
+                if estimate > limit:
+                    # Not marked as seen, it is only left out of this search
+                    if estimate < pruned:
+                        pruned = estimate
+                    continue
+                seen[node_open] = generation  # Marks the neighbouring position as seen
+                previous[node_open] = node
+                queue[tail] = node_open
+                tail += 1
+                # Convergence occurs if a position with unexplored neighbours is opened
+                converged = converged or levels[node_open] > 0
+
+            if head == layer_end:
+                # The whole layer was expanded, the queue now holds exactly the next layer
+                layer_ends.append(tail)
+                if converged:
+                    self.expanded = head
+                    return (head, tail), pruned
+                layer_end = tail
+                dist += 1
+        self.expanded = head
+        return None, pruned
+
+    def learn(self, distance: int):
+        # Raises the bounds of the positions expanded by the last search, which found the nearest frontier
+        # position of the robot not closer than distance. A position in layer k is then at least distance - k
+        # from the frontier, and the bounds stay consistent, as the positions left out had a higher estimate.
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        bound, queue = memoryview(self.bound), memoryview(self.queue)
+        layer_start = 0
+        for layer, layer_end in enumerate(self.layer_ends[:distance]):
+            raised = distance - layer
+            for i in range(layer_start, layer_end):
+                if bound[queue[i]] < raised:
+                    bound[queue[i]] = raised
+            layer_start = layer_end
+
+    def build(self):
+        # Sets the bounds to the distances to the nearest frontier position by one multi-source BFS over the known
+        # positions, known positions that reach no frontier position can never reach one
+        known = (self.cells > -1) & (self.explored > 0)
+        sources = np.flatnonzero(known & (self.levels > 0)).astype(np.int32)
+        self.generation += 1
+        self.seen[sources] = self.generation
+        self.bound[:] = 0
+        self.queue[:sources.size] = sources
+
+        # Memory views give plain integers on indexing, which is much cheaper than numpy scalars in this loop
+        cells, explored = memoryview(self.cells), memoryview(self.explored)
+        bound, seen, queue = memoryview(self.bound), memoryview(self.seen), memoryview(self.queue)
+        generation = self.generation
+        head, tail = 0, sources.size
+        while head < tail:
+            node = queue[head]
+            head += 1
+            dist = bound[node] + 1
+            for offset in self.offsets:
+                node_open = node + offset
+                if seen[node_open] == generation or cells[node_open] < 0 or not explored[node_open]:
+                    continue
+                seen[node_open] = generation
+                bound[node_open] = dist
+                queue[tail] = node_open
+                tail += 1
+        self.bound[known & (self.seen != generation)] = UNREACHABLE
+        self.built_size = tail
+        self.wasted = 0
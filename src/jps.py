@@ -0,0 +1,125 @@
+from src.path import Path
+import heapq
+import numpy as np
+import time
+
+
+def JPS(start, goal, grid):
+    # Performs Jump Point Search for 4-connected grids with uniform costs, returns a shortest path in the same
+    # format as AStar. Straight runs are scanned without opening their positions, only jump points enter the heap:
+    # row moves stop where a column move becomes necessary and column moves stop where a row scan finds one.
+    time_start = time.perf_counter() if grid.stats is not None else None
+    width = grid.padded_grid.shape[1]
+    # Explored passable positions of the padded grid, the goal counts as passable like in AStar
+    passable = bytearray(((grid.padded_grid > -1) & (grid.padded_explored > 0)).ravel().astype(np.uint8).tobytes())
+    start_idx = (int(start[0]) + 1) * width + int(start[1]) + 1
+    goal_idx = (int(goal[0]) + 1) * width + int(goal[1]) + 1
+    passable[goal_idx] = 1
+
+    search = JumpPointSearch(passable, width, goal_idx)
+    path = search.find_path(start_idx)
+    if time_start is not None:
+        grid.stats.record("jps", time.perf_counter() - time_start, search.expanded)
+    return path
+
+
+class JumpPointSearch:
+    # One search on the flat padded grid, directions are the offsets -1 and 1 along a row and -width and width
+    # along a column
+
+    def __init__(self, passable: bytearray, width: int, goal: int):
+        self.passable = passable
+        self.width = width
+        self.goal = goal
+        self.goal_x, self.goal_y = divmod(goal, width)
+        self.expanded = 0  # Number of closed jump points
+
+    def find_path(self, start: int) -> Path:
+        # Expands the jump points in A* order until the goal is reached
+        if start == self.goal:
+            return Path.empty(self.width - 2)
+        distance = {start: 0}
+        previous = {start: None}
+        directions = {start: None}  # Direction the jump point was reached in, None for all directions
+        closed = set()
+        heuristic = self.heuristic(start)
+        opened = [(heuristic, heuristic, start)]
+
+        while len(opened) > 0:
+            _, _, node = heapq.heappop(opened)
+            if node in closed:
+                continue
+            if node == self.goal:
+                return self.reconstruct_path(previous)
+            closed.add(node)
+            self.expanded += 1
+
+            for direction in self.successor_directions(directions[node]):
+                jump_point = self.jump(node, direction)
+                if jump_point is None or jump_point in closed:
+                    continue
+                dist = distance[node] + abs(jump_point - node) // (self.width if abs(direction) > 1 else 1)
+                if jump_point not in distance or dist < distance[jump_point]:
+                    distance[jump_point] = dist
+                    previous[jump_point] = node
+                    directions[jump_point] = direction
+                    heuristic = self.heuristic(jump_point)
+                    heapq.heappush(opened, (dist + heuristic, heuristic, jump_point))
+        return Path.empty(self.width - 2)
+
+    def heuristic(self, node: int) -> int:
+        # Manhattan distance to the goal
+        x, y = divmod(node, self.width)
+        return abs(self.goal_x - x) + abs(self.goal_y - y)
+
+    def successor_directions(self, direction):
+        # Directions worth continuing in after arriving in the direction, the search never turns back
+        if direction is None:
+            return -self.width, 1, self.width, -1
+        if abs(direction) == 1:
+            return direction, -self.width, self.width
+        return direction, -1, 1
+
+    def jump(self, node: int, direction: int):
+        # Moves from the node in the direction until a jump point, returns None at a wall
+        if abs(direction) == 1:
+            return self.jump_row(node, direction)
+        passable, goal, side = self.passable, self.goal, direction
+        while True:
+            node += direction
+            if not passable[node]:
+                return None
+            if node == goal:
+                return node
+            # Forced neighbours, a side opens right after a wall on the same side
+            for turn in (-1, 1):
+                if passable[node + turn] and not passable[node + turn - side]:
+                    return node
+            # Column moves stop wherever a scan along the row finds a jump point
+            if self.jump_row(node, -1) is not None or self.jump_row(node, 1) is not None:
+                return node
+
+    def jump_row(self, node: int, direction: int):
+        # Moves along the row until the goal or a forced neighbour above or below, returns None at a wall
+        passable, goal, width = self.passable, self.goal, self.width
+        while True:
+            node += direction
+            if not passable[node]:
+                return None
+            if node == goal:
+                return node
+            if (passable[node - width] and not passable[node - width - direction]) or \
+                    (passable[node + width] and not passable[node + width - direction]):
+                return node
+
+    def reconstruct_path(self, previous: dict) -> Path:
+        # Fills the straight runs between consecutive jump points, the start is left out
+        positions = list()
+        node = self.goal
+        while previous[node] is not None:
+            before = previous[node]
+            step = 1 if abs(node - before) < self.width else self.width
+            step = step if node > before else -step
+            positions.extend(range(node, before, -step))
+            node = before
+        return Path.from_padded(np.array(positions, dtype=np.int32), self.width)
@@ -0,0 +1,243 @@
+from src.path import Path
+import heapq
+import numpy as np
+import time
+
+
+class JunctionGraph:
+    # Graph of the known map where corridors are contracted into weighted edges. Nodes are the explored passable
+    # positions that are not plain corridor cells, junctions, dead ends and points of interest (start and mazes),
+    # edges keep the corridor cells between their two nodes. Searches run on the nodes and only the used corridors
+    # are expanded back into cells. Robots are attached to the graph at query time, as they move every step.
+    # Positions are flat indices of the padded grid, so neighbours never need bounds checks.
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.width = grid.padded_grid.shape[1]
+        size = grid.padded_grid.size
+        self.offsets = (-self.width, 1, self.width, -1)  # Up, right, down, left
+        self.known = np.zeros(size, dtype=bool)  # Explored passable positions the graph is built for
+        self.passable = bytearray(size)  # Python readable copy of known
+        self.node = bytearray(size)  # 1 for the nodes of the graph
+        self.edge_of = [-1] * size  # Edge running through each corridor position
+        self.index_in_edge = [0] * size  # Index of each corridor position in the cells of its edge
+        self.edges = dict()  # Edge id -> (first node, second node, corridor cells from the first node)
+        self.adjacent = dict()  # Node -> edge ids
+        self.next_edge = 0
+        self.built_for = None  # Value of grid.explored_changes the graph was updated for
+        self.expanded = 0  # Number of nodes expanded by the last search
+        self.update()
+
+    def update(self):
+        # Brings the graph up to date with the known map, only the edges around newly explored positions are rebuilt
+        if self.built_for == self.grid.explored_changes:
+            return
+        self.built_for = self.grid.explored_changes
+        known = ((self.grid.padded_grid > -1) & (self.grid.padded_explored > 0)).ravel()
+        new = np.flatnonzero(known & ~self.known)
+        if new.size == 0:
+            return
+        self.known = known
+        for position in new.tolist():
+            self.passable[position] = 1
+
+        # New positions change the degree of their neighbours, so both may change between node and corridor
+        dirty = np.unique(np.concatenate([new + offset for offset in (0,) + self.offsets]))
+        dirty = dirty[known[dirty]]
+        pending = set()  # Corridor positions without an edge
+        sources = set()  # Nodes that may have corridors without an edge
+        for position in dirty.tolist():
+            if self.node[position]:
+                for edge in list(self.adjacent.get(position, ())):
+                    self.remove_edge(edge, pending, sources)
+            elif self.edge_of[position] != -1:
+                self.remove_edge(self.edge_of[position], pending, sources)
+
+        # Nodes of removed edges are classified again too, so nodes that only split a loop become corridors
+        classified = set()
+        check = set(dirty.tolist()) | sources
+        while len(check) > 0:
+            classified |= check
+            positions = np.array(sorted(check), dtype=np.int64)
+            check = set()
+            for position, position_is_node in zip(positions.tolist(), self.classify(positions).tolist()):
+                if position_is_node:
+                    self.node[position] = 1
+                    self.adjacent.setdefault(position, set())
+                    sources.add(position)
+                    pending.discard(position)
+                    continue
+                if self.node[position]:
+                    removed = set()
+                    for edge in list(self.adjacent[position]):
+                        self.remove_edge(edge, pending, removed)
+                    check |= removed - classified
+                    sources |= removed
+                    self.node[position] = 0
+                    del self.adjacent[position]
+                sources.discard(position)
+                pending.add(position)
+
+        for source in sources:
+            if self.node[source]:
+                self.trace_from(source)
+        # Corridors closed into a loop without any node get their first position as a node
+        for position in sorted(pending):
+            if self.edge_of[position] == -1 and not self.node[position]:
+                self.node[position] = 1
+                self.adjacent[position] = set()
+                self.trace_from(position)
+
+    def classify(self, positions: np.array) -> np.array:
+        # Returns which of the known positions are nodes, all but the corridor positions with two known neighbours
+        known = self.known
+        degree = sum(known[positions + offset].astype(np.int8) for offset in self.offsets)
+        values = self.grid.padded_grid.ravel()[positions]
+        return (degree != 2) | (values == 1) | (values == 2)
+
+    def remove_edge(self, edge: int, pending: set, sources: set):
+        # Removes the edge, its corridor positions become pending and its nodes have to be traced again
+        first, second, cells = self.edges.pop(edge)
+        for cell in cells:
+            self.edge_of[cell] = -1
+        pending.update(cells)
+        for node in (first, second):
+            self.adjacent[node].discard(edge)
+            sources.add(node)
+
+    def trace_from(self, source: int):
+        # Traces every corridor leaving the node that does not have an edge yet
+        for offset in self.offsets:
+            position = source + offset
+            if not self.passable[position]:
+                continue
+            if self.node[position]:
+                # Neighbouring nodes are connected by an edge without corridor cells
+                if any(len(self.edges[edge][2]) == 0 and position in self.edges[edge][:2]
+                       for edge in self.adjacent[source]):
+                    continue
+            elif self.edge_of[position] != -1:
+                continue
+            self.trace(source, position)
+
+    def trace(self, source: int, position: int):
+        # Follows the corridor from the source node through position until the next node and adds the edge
+        edge = self.next_edge
+        self.next_edge += 1
+        cells = list()
+        previous = source
+        while not self.node[position]:
+            self.edge_of[position] = edge
+            self.index_in_edge[position] = len(cells)
+            cells.append(position)
+            # Corridor positions have exactly two known neighbours, the one not visited last is followed
+            for offset in self.offsets:
+                following = position + offset
+                if following != previous and self.passable[following]:
+                    break
+            previous, position = position, following
+        self.edges[edge] = (source, position, cells)
+        self.adjacent[source].add(edge)
+        self.adjacent[position].add(edge)
+
+    def attachments(self, position: int) -> list:
+        # Returns the (node, cost, edge, index from, index to) hops from a position to the nodes next to it,
+        # indices count the first node as -1 and the second node as the number of corridor cells
+        if self.node[position]:
+            return [(position, 0, -1, 0, 0)]
+        edge = self.edge_of[position]
+        first, second, cells = self.edges[edge]
+        i = self.index_in_edge[position]
+        return [(first, i + 1, edge, i, -1), (second, len(cells) - i, edge, i, len(cells))]
+
+    def find_path(self, start: tuple, goal: tuple) -> Path:
+        # Finds a shortest path on the known map, ordered like AStar paths, empty if the goal is unreachable
+        time_start = time.perf_counter() if self.grid.stats is not None else None
+        self.update()
+        start = (int(start[0]) + 1) * self.width + int(start[1]) + 1
+        goal = (int(goal[0]) + 1) * self.width + int(goal[1]) + 1
+        self.expanded = 0
+        path = None
+        if start != goal and self.passable[start] and self.passable[goal]:
+            path = self.search(start, goal)
+        if time_start is not None:
+            self.grid.stats.record("junction_search", time.perf_counter() - time_start, self.expanded)
+        return path if path is not None else Path.empty(self.width - 2)
+
+    def search(self, start: int, goal: int):
+        # A* over the nodes, the start and the goal are connected to the nodes of their corridors
+        width = self.width
+        goal_x, goal_y = divmod(goal, width)
+
+        def heuristic(node):
+            x, y = divmod(node, width)
+            return abs(goal_x - x) + abs(goal_y - y)
+
+        # Hops from the nodes next to the goal to the goal itself, both ends of a loop are the same node, so only
+        # the shorter way round is kept
+        goal_hops = dict()
+        for node, cost, edge, i, j in self.attachments(goal):
+            if edge != -1 and (node not in goal_hops or cost < goal_hops[node][0]):
+                goal_hops[node] = (cost, edge, j, i)
+
+        distance = dict()
+        previous = dict()  # Node -> (previous node, edge, index from, index to)
+        opened = list()
+        for node, cost, edge, i, j in self.attachments(start):
+            if node not in distance or cost < distance[node]:
+                distance[node] = cost
+                previous[node] = (start, edge, i, j)
+                heapq.heappush(opened, (cost + heuristic(node), node))
+        if not self.node[start] and not self.node[goal] and self.edge_of[start] == self.edge_of[goal]:
+            # The start and the goal lie in the same corridor
+            i, j = self.index_in_edge[start], self.index_in_edge[goal]
+            distance[goal] = abs(i - j)
+            previous[goal] = (start, self.edge_of[start], i, j)
+            heapq.heappush(opened, (abs(i - j), goal))
+
+        closed = set()
+        while len(opened) > 0:
+            _, node = heapq.heappop(opened)
+            if node in closed:
+                continue
+            if node == goal:
+                return self.expand(start, goal, previous)
+            closed.add(node)
+            self.expanded += 1
+            dist = distance[node]
+            hops = list()
+            if node in goal_hops:
+                cost, edge, i, j = goal_hops[node]
+                hops.append((goal, cost, edge, i, j))
+            if node != start or self.node[start]:
+                for edge in self.adjacent[node]:
+                    first, second, cells = self.edges[edge]
+                    if first == second:
+                        # Loops never shorten a path
+                        continue
+                    if first == node:
+                        hops.append((second, len(cells) + 1, edge, -1, len(cells)))
+                    else:
+                        hops.append((first, len(cells) + 1, edge, len(cells), -1))
+            for node_open, cost, edge, i, j in hops:
+                if node_open in closed:
+                    continue
+                if node_open not in distance or dist + cost < distance[node_open]:
+                    distance[node_open] = dist + cost
+                    previous[node_open] = (node, edge, i, j)
+                    heapq.heappush(opened, (dist + cost + heuristic(node_open), node_open))
+        return None
+
+    def expand(self, start: int, goal: int, previous: dict) -> Path:
+        # Expands the found hops back into positions, the goal first and the position after the start last
+        positions = list()
+        node = goal
+        while node != start:
+            before, edge, i, j = previous[node]
+            first, second, cells = self.edges[edge]
+            # Positions of the hop from index j back towards index i, without the position at index i
+            step = -1 if j > i else 1
+            for index in range(j, i, step):
+                positions.append(first if index == -1 else second if index == len(cells) else cells[index])
+            node = before
+        return Path.from_padded(np.array(positions, dtype=np.int32), self.width)
@@ -1,55 +1,114 @@
-from src.robot import Robot
+from src.robot import Robot, RobotFleet
 from src.grid import Grid
 from src.astar import AStar
+from src.bfs import DistanceField
+from src.distances import assignment, cost_matrix, MazeIndex
+from src.frontier import FrontierField
+from src.gridfile import ENCODING, read_grid_file
+from src.hpa import HierarchicalPlanner
+from src.incremental import IncrementalBFS
+from src.jps import JPS
+from src.junction import JunctionGraph
+from src.parallel import ParallelPlanner
+from src.path import Path
+from src.stats import Stats
+from src.textdrawer import TextDrawer
+import heapq
 import numpy as np
-import scipy
+import time
 
 MAX_EXPLORATION_STEPS = 10_000
 
-ENCODING = {
-    '.': 0,   # Nothing
-    ' ': 0,   # Nothing
-    '#': -1,  # Wall
-    'S': 1,   # Start place
-    'B': 2    # Maze
-}
+# "robot": every robot plans its own BFS, "fleet": all robots descend one shared frontier distance field,
+# "incremental": every robot plans its own BFS pruned by frontier distance bounds kept between the searches
+EXPLORATION_PLANNERS = ("robot", "fleet", "incremental")
+# "astar": paths to the mazes are searched by AStar, "hpa": by hierarchical path-finding on clusters of the known map,
+# "junction": by A* on the known map with corridors contracted into single edges, "jps": by Jump Point Search
+TRANSPORT_PLANNERS = ("astar", "hpa", "junction", "jps")
+# Order in which the mazes left after the initial assignment are handed out to the robots at the start
+MAZE_ORDERS = ("farthest", "nearest")
+# Version of the .npz snapshots written by MainController.save_snapshot
+SNAPSHOT_VERSION = 1
 
 
 class MainController:
-    def __init__(self, grid: Grid, robots: list[Robot]):
-        # Initializes the MainController object with a grid and a list of robots
+    def __init__(self, grid: Grid, robots: list[Robot], exploration_planner: str = "robot",
+                 transport_planner: str = "astar", stats: Stats = None, planning_workers: int = 0,
+                 maze_order: str = "farthest"):
+        # Initializes the MainController object with a grid and a list of robots, passing stats enables profiling.
+        # With planning_workers the per robot BFS, AStar and JPS searches of a round run in a pool of processes.
+        if exploration_planner not in EXPLORATION_PLANNERS:
+            raise ValueError(f"Unknown exploration planner {exploration_planner}!")
+        if transport_planner not in TRANSPORT_PLANNERS:
+            raise ValueError(f"Unknown transport planner {transport_planner}!")
+        if maze_order not in MAZE_ORDERS:
+            raise ValueError(f"Unknown maze order {maze_order}!")
+        if planning_workers < 0:
+            raise ValueError(f"Number of planning workers {planning_workers} is negative!")
         self.grid = grid
-        self.robots = robots
+        self.grid.stats = stats
+        self.stats = stats
+        # The grid moves to shared memory before any planner takes views of its arrays
+        self.parallel = ParallelPlanner(grid, planning_workers) if planning_workers > 0 else None
+        self.robots = robots if isinstance(robots, RobotFleet) else RobotFleet(robots)
+        self.exploration_planner = exploration_planner
+        self.frontier_field = FrontierField(grid) if exploration_planner == "fleet" else None
+        if exploration_planner == "incremental":
+            # Every BFS call uses the engine of the grid, it is set after moving the grid to shared memory, which resets it
+            grid.bfs_engine = IncrementalBFS(grid)
+        self.transport_planner = transport_planner
+        self.path_planner = None  # Planner other than AStar, built on the known map when the transportation begins
+        self.path_planner_for = None  # Value of grid.explored_changes the HPA* planner was built for
         self.exploration_steps = 0
         self.transportation_steps = 0
-        for robot in self.robots:
-            # Initial exploration
-            robot.explore(grid)
+        # Initial exploration
+        self.robots.explore(grid)
         self.mazes_found = (self.grid.grid * self.grid.explored == 2).sum()
         self.start_found = False
+        self.depot_field = None  # Distances and paths to the start, built when the transportation begins
+        self.depot_field_final = False  # True if the depot field was built after the exploration ended
+        self.maze_order = maze_order
+        self.maze_index = None  # Mazes left after the initial assignment, built when the transportation begins
+        # State of the overlapped phases (do_overlapped)
+        self.carriers = set()  # Robots going for a maze or carrying one to the start
+        self.claimed = set()  # Mazes a carrier goes for
+        self.exploring = True  # False once nothing useful is left to find
+        self.components = None  # Connected components of the known map and the explored_changes they are for
+        self.trajectory = None  # TrajectoryLog the robots are recorded to after every round, None disables recording
 
     def do_exploration(self, verbose=False, pg_drawer=None):
-        # Performs the exploration phase
+        # Performs the exploration phase, verbose prints every step (see print_step)
         explore = True  # Checking if there is something to explore
 
         while explore:
             # Exploration round
+            time_start = time.perf_counter() if self.stats is not None else None
             explore = self.exploration_round()
             self.exploration_steps += 1
             # Checking for founded mazes and start
             self.mazes_found = (self.grid.grid * self.grid.explored == 2).sum()
             self.start_found = (self.grid.grid * self.grid.explored == 1).sum() > 0
+            if self.trajectory is not None:
+                self.trajectory.record(self.exploration_steps, self.robots)
 
             if self.exploration_steps > MAX_EXPLORATION_STEPS:
                 # Not wanting infinite loop
-                break
-            if verbose:
-                self.grid.print(self.robots, True)
-            if pg_drawer is not None:
-                pg_drawer.draw_grid(self.grid, self.robots, True)
+                explore = False
+            else:
+                if verbose:
+                    self.print_step(verbose)
+                if pg_drawer is not None:
+                    pg_drawer.draw_grid(self.grid, self.robots, True)
+            # The round ends after drawing, so the drawing is traced with the round it shows
+            if time_start is not None:
+                self.stats.end_round("exploration", self.exploration_steps, time.perf_counter() - time_start)
 
     def exploration_round(self):
         # Performs one round of exploration for each robot
+        if self.frontier_field is not None:
+            return self.fleet_exploration_round()
+        if self.parallel is not None and self.exploration_planner == "robot":
+            return self.parallel_exploration_round()
         for r in self.robots:
             if not r.exploration_move(self.grid):
                 # When there is nothing to explore
@@ -57,68 +116,386 @@ class MainController:
             r.explore(self.grid)
         return True
 
-    def do_transportation(self, verbose=False, pg_drawer=None):
-        # Performs the transportation phase if the start place is found
+    def parallel_exploration_round(self):
+        # Performs one round of exploration where the replans of all robots are searched at once by the workers on
+        # the map at the beginning of the round. Robots still move one after another, so a robot that explores
+        # changes the map for the following ones. A BFS path of length d only depends on positions at most d + 1
+        # steps from the robot, so it is kept if every position explored earlier in the round is farther, otherwise
+        # the robot plans again on the current map. The paths are the same as in exploration_round.
+        replanning = [r for r in self.robots if r.needs_replan(self.grid)]
+        planned = dict()
+        if len(replanning) > 1:
+            paths = self.parallel.exploration_paths([(r.x, r.y) for r in replanning])
+            planned = {r.i: path for r, path in zip(replanning, paths)}
+
+        explored_at = list()  # Positions of the robots that explored something new in this round
+        for r in self.robots:
+            path = planned.get(r.i)
+            if path is not None:
+                reach = len(path) + 2 if len(path) > 0 else None  # An empty path depends on the whole map
+                if all(reach is not None and abs(x - r.x) + abs(y - r.y) > reach for x, y in explored_at):
+                    r.path = path
+                    if self.stats is not None:
+                        self.stats.count("exploration_replan")
+                elif self.stats is not None:
+                    self.stats.count("parallel_plan_rejected")
+            if not r.exploration_move(self.grid):
+                # When there is nothing to explore
+                return False
+            changes = self.grid.explored_changes
+            r.explore(self.grid)
+            if self.grid.explored_changes != changes:
+                explored_at.append((r.x, r.y))
+        return True
+
+    def fleet_exploration_round(self):
+        # Performs one round of exploration where all robots move by the shared frontier distance field
+        self.frontier_field.update(self.robots)
+        for r in self.robots:
+            if not self.frontier_field.move(r):
+                # When there is nothing to explore
+                return False
+            r.explore(self.grid)
+        return True
+
+    def do_transportation(self, verbose=False, pg_drawer=None, fast_forward=False):
+        # Performs the transportation phase if the start place is found, fast_forward jumps between the steps in
+        # which some robot needs a decision instead of moving all robots every step
         if not self.start_found:
             return None
 
-        # Position of the founded mazes
-        mazes = np.nonzero(self.grid.grid * self.grid.explored == 2)
-        mazes = [(mazes[0][i], mazes[1][i]) for i in range(len(mazes[0]))]
+        if self.maze_index is None:
+            # The known map does not change during transportation, so all return paths are read off one field
+            self.depot_field = DistanceField(self.grid, [self.grid.start])
+            self.update_path_planner()
 
-        # Initial maze assignment
-        self.assign_mazes(mazes)
+            # Position of the founded mazes
+            mazes = np.nonzero(self.grid.grid * self.grid.explored == 2)
+            mazes = [(mazes[0][i], mazes[1][i]) for i in range(len(mazes[0]))]
+
+            # Initial maze assignment
+            self.assign_mazes(mazes)
+            self.maze_index = MazeIndex(self.depot_field, mazes, self.maze_order == "farthest")
+        if fast_forward:
+            self.fast_forward_transportation(verbose, pg_drawer)
+            return
 
         while len(self.robots) > 0:
             # Do transportation round
-            self.transportation_round(mazes)
+            time_start = time.perf_counter() if self.stats is not None else None
+            self.transportation_round()
             self.transportation_steps += 1
+            if self.trajectory is not None:
+                self.trajectory.record(self.exploration_steps + self.transportation_steps, self.robots)
             if verbose:
-                self.grid.print(self.robots, True)
+                self.print_step(verbose)
             if pg_drawer is not None:
                 pg_drawer.draw_grid(self.grid, self.robots, True)
+            if time_start is not None:
+                self.stats.end_round("transportation", self.transportation_steps, time.perf_counter() - time_start)
 
     def assign_mazes(self, mazes):
         # Assign mazes to robots based on the distances between them.
+        time_start = time.perf_counter() if self.stats is not None else None
         robots_pos = [(r.x, r.y) for r in self.robots]
-        distances = np.zeros((len(robots_pos), len(mazes)))
-
-        # Calculate distances between robots and mazes
-        for i in range(len(robots_pos)):
-            for j in range(len(mazes)):
-                distances[i, j] = abs(robots_pos[i][0] - mazes[j][0]) + abs(robots_pos[i][1] - mazes[j][1])
+        # Calculate shortest path distances on the known map between robots and mazes
+        distances = cost_matrix(self.grid, robots_pos, mazes)
 
         to_remove = []
-        rob_idx, maze_idx = scipy.optimize.linear_sum_assignment(distances)
+        rob_idx, maze_idx = assignment(distances)
 
         # Assign mazes to robots and remove assigned mazes from the list
-        for rob_i, maze_i in zip(rob_idx, maze_idx):
+        robots = list(self.robots)
+        paths = self.find_paths([((robots[rob_i].x, robots[rob_i].y), mazes[maze_i])
+                                 for rob_i, maze_i in zip(rob_idx, maze_idx)])
+        assigned = set()
+        for rob_i, maze_i, path in zip(rob_idx, maze_idx, paths):
+            if len(path) == 0 and (robots[rob_i].x, robots[rob_i].y) != tuple(mazes[maze_i]):
+                # The maze is not reachable from the robot on the known map
+                continue
+            assigned.add(rob_i)
             to_remove.append(mazes[maze_i])
-            self.robots[rob_i].path = AStar((self.robots[rob_i].x, self.robots[rob_i].y), mazes[maze_i], self.grid)
+            robots[rob_i].path = path
         for m in to_remove:
             mazes.remove(m)
+        # Robots left without a maze (more robots than mazes) have nothing to carry
+        for i, rob in enumerate(robots):
+            if i not in assigned:
+                self.robots.remove(rob)
+        if time_start is not None:
+            self.stats.record("assign_mazes", time.perf_counter() - time_start)
+
+    def update_path_planner(self):
+        # Builds the selected transport planner on the known map, the junction graph follows the map by itself,
+        # HPA* cannot be updated and is built again after the map changed
+        if self.transport_planner == "hpa" and self.path_planner_for != self.grid.explored_changes:
+            self.path_planner = HierarchicalPlanner(self.grid)
+            self.path_planner_for = self.grid.explored_changes
+        elif self.transport_planner == "junction" and self.path_planner is None:
+            self.path_planner = JunctionGraph(self.grid)
+
+    def find_path(self, start, goal):
+        # Finds a path on the known map with the selected transport planner
+        if self.path_planner is not None:
+            return self.path_planner.find_path(start, goal)
+        if self.transport_planner == "jps":
+            return JPS(start, goal, self.grid)
+        return AStar(start, goal, self.grid)
+
+    def find_paths(self, pairs: list) -> list:
+        # Finds the paths between (start, goal) pairs on the known map, in the worker pool if there is one and the
+        # transport planner does not keep its own state
+        if self.parallel is not None and self.path_planner is None and len(pairs) > 1:
+            return self.parallel.transport_paths(self.transport_planner, pairs)
+        return [self.find_path(start, goal) for start, goal in pairs]
 
-    def transportation_round(self, mazes):
+    def transportation_round(self):
         # Performs one round of transportation for each robot
         to_remove = []
         for rob in self.robots:
-            # Do transportation move
-            if rob.transportation_move(self.grid):
+            # Do transportation move, all moved robots explore together at the end of the round
+            if rob.transportation_move(self.grid, explore=False):
                 if rob.carry_maze:
                     # When carrying maze, find path to the beginning
-                    rob.path = AStar((rob.x, rob.y), self.grid.start, self.grid)
+                    rob.path = self.depot_field.path_to_root(rob.x, rob.y)
                 else:
-                    if len(mazes) == 0:
-                        # When no mazes are left, remove the robot
+                    # Take the next remaining maze, the path to it is read off the depot field
+                    maze, path = self.maze_index.pop()
+                    if maze is None:
+                        # When no reachable mazes are left, remove the robot
                         to_remove.append(rob)
                         continue
-                    else:
-                        # Find the nearest maze
-                        maze = min(mazes, key=lambda m: abs(m[0] - rob.x) + abs(m[1] - rob.y))
-                        rob.path = AStar((rob.x, rob.y), maze, self.grid)
-                        mazes.remove(maze)
+                    rob.path = path
         for rob in to_remove:
             self.robots.remove(rob)
+        self.robots.explore(self.grid)
+
+    def fast_forward_transportation(self, verbose=False, pg_drawer=None):
+        # Event-driven transportation giving the same steps as the rounds of transportation_round. Robots only
+        # follow their paths between decisions (picking up a maze, dropping it at the start or leaving), so a heap
+        # keeps the step of the next decision of every robot and the moves before it are applied at once. Robots
+        # deciding in the same step are handled in the fleet order, like in a round.
+        base = self.transportation_steps  # Non-zero when continuing from a snapshot
+        since = dict()  # Robot index -> step up to which the robot moved along its path
+        events = list()  # Heap of (step of the next decision, robot index)
+        for rob in self.robots:
+            since[rob.i] = base
+            # A path of length n is followed in the next n steps and the decision comes in the one after
+            events.append((base + len(rob.path) + 1, rob.i))
+        heapq.heapify(events)
+
+        while len(events) > 0:
+            step = events[0][0]
+            time_start = time.perf_counter() if self.stats is not None else None
+            if self.trajectory is not None:
+                self.record_skipped_steps(since, step)
+            while len(events) > 0 and events[0][0] == step:
+                _, i = heapq.heappop(events)
+                rob = self.robots.views[i]
+                self.follow_path(rob, step - since[rob.i])
+                since[rob.i] = step
+                rob.transportation_move(self.grid, explore=False)
+                if rob.carry_maze:
+                    # When carrying maze, find path to the beginning
+                    rob.path = self.depot_field.path_to_root(rob.x, rob.y)
+                else:
+                    # Take the next remaining maze, the path to it is read off the depot field
+                    maze, path = self.maze_index.pop()
+                    if maze is None:
+                        # When no reachable mazes are left, remove the robot
+                        self.robots.remove(rob)
+                        continue
+                    rob.path = path
+                heapq.heappush(events, (step + len(rob.path) + 1, rob.i))
+            self.transportation_steps = step
+
+            if verbose or pg_drawer is not None or self.trajectory is not None:
+                # Robots between their decisions are brought to the current step only for drawing and recording
+                for rob in self.robots:
+                    self.follow_path(rob, step - since[rob.i])
+                    since[rob.i] = step
+            if self.trajectory is not None:
+                self.trajectory.record(self.exploration_steps + step, self.robots)
+            if verbose:
+                self.print_step(verbose)
+            if pg_drawer is not None:
+                pg_drawer.draw_grid(self.grid, self.robots, True)
+            if time_start is not None:
+                self.stats.end_round("transportation", step, time.perf_counter() - time_start)
+
+    def record_skipped_steps(self, since: dict, step: int):
+        # Records the steps between the last decision and the given one, the robots are moved along their paths one
+        # step at a time, so the trajectory has a record after every step like with transportation_round
+        for skipped in range(self.transportation_steps + 1, step):
+            for rob in self.robots:
+                self.follow_path(rob, skipped - since[rob.i])
+                since[rob.i] = skipped
+            self.trajectory.record(self.exploration_steps + skipped, self.robots)
+
+    def follow_path(self, rob, moves: int):
+        # Moves the robot by up to the given number of positions along its path at once and explores them
+        if moves <= 0 or len(rob.path) == 0:
+            return
+        x, y = np.divmod(rob.path.skip(moves), rob.path.width)
+        rob.x, rob.y = int(x[-1]), int(y[-1])
+        self.grid.mark_explored_many(np.concatenate([x, x - 1, x + 1, x, x]),
+                                     np.concatenate([y, y, y, y - 1, y + 1]))
+
+    def do_overlapped(self, verbose=False, pg_drawer=None):
+        # Performs the exploration and the transportation together. Robots start carrying as soon as a found maze
+        # is connected to the start on the known map, while the others keep exploring until every maze and the start
+        # are found. Rounds up to the last one in which a robot explored count as exploration steps.
+        steps = self.exploration_steps + self.transportation_steps  # Non-zero when continuing from a snapshot
+        while len(self.robots) > 0:
+            time_start = time.perf_counter() if self.stats is not None else None
+            explored = self.overlapped_round()
+            if explored is None:
+                break
+            steps += 1
+            if explored:
+                self.exploration_steps = steps
+                if self.exploration_steps > MAX_EXPLORATION_STEPS:
+                    # Not wanting infinite loop
+                    self.exploring = False
+            self.transportation_steps = steps - self.exploration_steps
+            if self.trajectory is not None:
+                self.trajectory.record(steps, self.robots)
+            if verbose:
+                self.print_step(verbose)
+            if pg_drawer is not None:
+                pg_drawer.draw_grid(self.grid, self.robots, True)
+            if time_start is not None:
+                self.stats.end_round("overlapped", steps, time.perf_counter() - time_start)
+
+    def overlapped_round(self):
+        # Performs one round of the overlapped phases, returns True if any robot explored and None if no robot is
+        # left to move
+        self.mazes_found = self.carried_mazes() + int(((self.grid.grid == 2) & self.grid.explored).sum())
+        self.start_found = bool(((self.grid.grid == 1) & self.grid.explored).any())
+        if self.start_found and self.mazes_found == self.grid.n_mazes:
+            # Nothing useful is left to find
+            self.exploring = False
+        self.assign_found_mazes()
+        if not self.exploring:
+            # Robots without a maze have nothing left to do
+            for rob in self.robots:
+                if rob not in self.carriers:
+                    self.robots.remove(rob)
+            if len(self.robots) == 0:
+                return None
+
+        if self.exploring and self.frontier_field is not None:
+            self.frontier_field.update([r for r in self.robots if r not in self.carriers])
+        explored = False
+        for rob in self.robots:
+            if rob in self.carriers:
+                if rob.transportation_move(self.grid, explore=False):
+                    if rob.carry_maze:
+                        # When carrying maze, find path to the beginning
+                        self.update_depot_field([(rob.x, rob.y)])
+                        rob.path = self.depot_field.path_to_root(rob.x, rob.y)
+                    elif not self.take_next_maze(rob):
+                        # The robot at the start explores again or leaves at the beginning of the next round
+                        self.carriers.remove(rob)
+            elif self.exploring:
+                explored = self.exploration_step(rob) or explored
+        self.robots.explore(self.grid)
+        return explored
+
+    def exploration_step(self, rob) -> bool:
+        # Moves an exploring robot, returns False and stops the exploration if there is nothing to explore
+        if self.frontier_field is not None:
+            moved = self.frontier_field.move(rob)
+        else:
+            moved = rob.exploration_move(self.grid)
+        if not moved:
+            self.exploring = False
+            return False
+        rob.explore(self.grid)
+        return True
+
+    def known_components(self) -> np.array:
+        # Labels the connected components of the known map, cached until the explored array changes
+        if self.components is None or self.components[1] != self.grid.explored_changes:
+            # scipy is imported only here, so runs that never overlap the phases do not pay for loading it
+            from scipy.ndimage import label
+            labels, _ = label((self.grid.grid > -1) & self.grid.explored)
+            self.components = (labels, self.grid.explored_changes)
+        return self.components[0]
+
+    def available_mazes(self) -> list:
+        # Returns the found mazes no carrier goes for that are connected to the start on the known map
+        if not self.start_found:
+            return []
+        mazes = [(int(x), int(y)) for x, y in zip(*np.nonzero((self.grid.grid == 2) & self.grid.explored))]
+        mazes = [m for m in mazes if m not in self.claimed]
+        if len(mazes) == 0:
+            return []
+        labels = self.known_components()
+        return [m for m in mazes if labels[m] == labels[self.grid.start]]
+
+    def assign_found_mazes(self):
+        # Sends robots without a maze for the available mazes, the nearest pairs first. While there is something
+        # to find some robots keep exploring.
+        idle = [r for r in self.robots if r not in self.carriers]
+        n_assign = len(idle) - self.explorers_needed()
+        mazes = self.available_mazes() if n_assign > 0 else []
+        if len(mazes) == 0:
+            return
+        labels = self.known_components()
+        free = [r for r in idle if labels[r.x, r.y] == labels[self.grid.start]]
+        n_assign = min(n_assign, len(mazes), len(free))
+        if n_assign == 0:
+            return
+
+        time_start = time.perf_counter() if self.stats is not None else None
+        distances = cost_matrix(self.grid, [(r.x, r.y) for r in free], mazes)
+        pairs = sorted(zip(*assignment(distances)), key=lambda pair: distances[pair])
+
+        self.update_path_planner()
+        paths = self.find_paths([((free[rob_i].x, free[rob_i].y), mazes[maze_i]) for rob_i, maze_i in pairs[:n_assign]])
+        for (rob_i, maze_i), path in zip(pairs[:n_assign], paths):
+            self.carriers.add(free[rob_i])
+            self.claimed.add(mazes[maze_i])
+            free[rob_i].path = path
+        if time_start is not None:
+            self.stats.record("assign_mazes", time.perf_counter() - time_start)
+
+    def explorers_needed(self) -> int:
+        # Number of robots kept exploring, proportional to the share of mazes still hidden
+        if not self.exploring:
+            return 0
+        hidden = self.grid.n_mazes - self.mazes_found
+        return max(1, -(-len(self.robots) * hidden // max(self.grid.n_mazes, 1)))
+
+    def take_next_maze(self, rob) -> bool:
+        # Sends a robot standing at the start for the farthest or nearest available maze as given by maze_order,
+        # returns False if there is none
+        mazes = self.available_mazes()
+        if len(mazes) == 0:
+            return False
+        self.update_depot_field(mazes)
+        choose = max if self.maze_order == "farthest" else min
+        maze = choose(mazes, key=lambda m: self.depot_field.get_distance(*m))
+        self.claimed.add(maze)
+        rob.path = self.depot_field.path_from_root(*maze)
+        return True
+
+    def update_depot_field(self, positions: list):
+        # Builds the depot field again if it does not reach all given positions, and once more after the exploration
+        # ended. Paths read off an older field stay valid, they may only miss shortcuts found since it was built.
+        if self.depot_field is not None and (self.exploring or self.depot_field_final) and \
+                all(self.depot_field.get_distance(x, y) != -1 for x, y in positions):
+            return
+        self.depot_field = DistanceField(self.grid, [self.grid.start])
+        self.depot_field_final = not self.exploring
+
+    def print_step(self, verbose):
+        # Prints the grid with the robots for verbose=True, a TextDrawer passed as verbose writes the step instead
+        if isinstance(verbose, TextDrawer):
+            verbose.draw_grid(self.grid, self.robots, True)
+        else:
+            self.grid.print(self.robots, True)
 
     def print_result(self):
         # Prints the result of the exploration and transportation phases
@@ -128,23 +505,102 @@ class MainController:
         print("Exploration steps: ", self.exploration_steps)
         print("Transportation steps: ", self.transportation_steps)
         print("Total steps: ", self.exploration_steps + self.transportation_steps)
-        carried_mazes = self.grid.n_mazes - (self.grid.grid == 2).sum()
-        print(f"Transported {carried_mazes} out of {self.grid.n_mazes}")
-
-
-def instantiate_robot(robots: list[Robot], x: int, y: int):
-    # Creates a new Robot object and adds it to the list of robots.
-    robots.append(Robot(x, y))
-    return 0
-
-
-def load_from_file(path: str) -> MainController:
-    # Loads the grid and robots from a file and creates a MainController
-    grid = []
-    robots = []
-    with open(path) as file:
-        for x, line in enumerate(file):
-            grid_line = [instantiate_robot(robots, x, y) if ch == 'R' else ENCODING[ch]
-                         for y, ch in enumerate(line.strip())]
-            grid.append(grid_line)
-    return MainController(Grid(np.array(grid)), robots)
+        print(f"Transported {self.carried_mazes()} out of {self.grid.n_mazes}")
+        if self.stats is not None:
+            print()
+            self.stats.print()
+
+    def carried_mazes(self) -> int:
+        # Number of mazes already carried away from their position
+        return int(self.grid.n_mazes - (self.grid.grid == 2).sum())
+
+    def close(self):
+        # Stops the planning workers, the simulation can continue without them
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Stops the planning workers also when the simulation failed
+        self.close()
+
+    def save_snapshot(self, path: str):
+        # Saves the state of the simulation to a compressed .npz file, load_snapshot continues from it with the same
+        # steps as the uninterrupted run. Planners are built again from the map, only the depot field is saved, as
+        # it may have been built on an older map than the saved one.
+        width = self.grid.grid.shape[1]
+        paths = [p.positions[p.start:p.cursor] if isinstance(p, Path) else
+                 np.array([x * width + y for x, y in p], dtype=np.int32) for p in self.robots.paths]
+        depot = self.depot_field
+        np.savez_compressed(
+            path, version=SNAPSHOT_VERSION,
+            exploration_planner=self.exploration_planner, transport_planner=self.transport_planner,
+            maze_order=self.maze_order,
+            cells=self.grid.grid, explored=self.grid.explored, n_mazes=self.grid.n_mazes,
+            explored_changes=self.grid.explored_changes,
+            robot_x=np.array(self.robots.x, dtype=np.int64), robot_y=np.array(self.robots.y, dtype=np.int64),
+            carry_maze=np.array(self.robots.carry_maze, dtype=bool), active=self.robots.active,
+            path_lengths=np.array([p.size for p in paths], dtype=np.int64),
+            path_positions=np.concatenate(paths + [np.empty(0, dtype=np.int32)]).astype(np.int32),
+            exploration_steps=self.exploration_steps, transportation_steps=self.transportation_steps,
+            mazes_found=self.mazes_found, start_found=self.start_found,
+            depot_distance=depot.distance if depot is not None else np.empty(0, dtype=np.int32),
+            depot_previous=depot.previous if depot is not None else np.empty(0, dtype=np.int32),
+            depot_field_final=self.depot_field_final,
+            maze_index=np.array(self.maze_index.mazes() if self.maze_index is not None else [],
+                                dtype=np.int64).reshape(-1, 2),
+            has_maze_index=self.maze_index is not None,
+            carriers=np.array(sorted(r.i for r in self.carriers), dtype=np.int64),
+            claimed=np.array(sorted(self.claimed), dtype=np.int64).reshape(-1, 2), exploring=self.exploring)
+
+
+def load_from_file(path: str, **kwargs) -> MainController:
+    # Loads the grid and robots from a text or binary file and creates a MainController,
+    # kwargs are passed to the MainController
+    grid, robots = read_grid_file(path)
+    return MainController(grid, robots, **kwargs)
+
+
+def load_snapshot(path: str, **kwargs) -> MainController:
+    # Loads a snapshot saved by MainController.save_snapshot, kwargs are passed to the MainController and by
+    # default the planners are the saved ones
+    with np.load(path) as data:
+        if int(data["version"]) != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a snapshot of version {SNAPSHOT_VERSION}!")
+        kwargs = {"exploration_planner": str(data["exploration_planner"]),
+                  "transport_planner": str(data["transport_planner"]), "maze_order": str(data["maze_order"]),
+                  **kwargs}
+        grid = Grid(data["cells"].astype(np.int8))
+        grid.n_mazes = int(data["n_mazes"])
+        grid.explored[:] = data["explored"]
+        grid.exploration_level[:] = grid.recalculate_exploration_levels()
+
+        robots = RobotFleet([Robot(int(x), int(y)) for x, y in zip(data["robot_x"], data["robot_y"])])
+        robots.carry_maze[:] = data["carry_maze"].tolist()
+        width = grid.grid.shape[1]
+        ends = np.cumsum(data["path_lengths"])
+        for i, positions in enumerate(np.split(data["path_positions"], ends[:-1])):
+            robots.paths[i] = Path(positions.astype(np.int32), width)
+        for i in np.flatnonzero(~data["active"]):
+            robots.remove(robots.views[i])
+
+        mc = MainController(grid, robots, **kwargs)
+        grid.explored_changes = int(data["explored_changes"])
+        mc.exploration_steps = int(data["exploration_steps"])
+        mc.transportation_steps = int(data["transportation_steps"])
+        mc.mazes_found = int(data["mazes_found"])
+        mc.start_found = bool(data["start_found"])
+        if data["depot_distance"].size > 0:
+            mc.depot_field = DistanceField.from_arrays(data["depot_distance"], data["depot_previous"],
+                                                       grid.padded_grid.shape[1])
+        mc.depot_field_final = bool(data["depot_field_final"])
+        if bool(data["has_maze_index"]):
+            mc.maze_index = MazeIndex(mc.depot_field, [tuple(m) for m in data["maze_index"].tolist()],
+                                      mc.maze_order == "farthest")
+        mc.carriers = {robots.views[i] for i in data["carriers"].tolist()}
+        mc.claimed = {tuple(m) for m in data["claimed"].tolist()}
+        mc.exploring = bool(data["exploring"])
+    return mc
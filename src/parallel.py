@@ -0,0 +1,90 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from src.astar import AStar
+from src.bfs import BFS
+from src.grid import Grid
+from src.jps import JPS
+from src.robot import Robot
+import numpy as np
+import time
+import weakref
+
+# Grid of a worker process, its arrays are views of the shared memory of the planner
+_grid = None
+
+
+class ParallelPlanner:
+    # Persistent pool of worker processes planning paths on the same grid as the simulation. The padded grid,
+    # explored and exploration level arrays are moved to shared memory, so the workers always read the current
+    # state without any copying. Workers only read, the simulation changes the arrays only while no plans are
+    # being searched, and the results come back in the order of the requests. The workers are stopped and the
+    # shared memory is unlinked by close, or at the latest when the planner is garbage collected or Python exits.
+
+    def __init__(self, grid: Grid, workers: int):
+        self.grid = grid
+        self.workers = workers
+        self.blocks = list()  # Shared memory blocks, unlinked by close
+        arrays = list()
+        for array in (grid.padded_grid, grid.padded_explored, grid.padded_exploration_level):
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[:] = array
+            self.blocks.append(block)
+            arrays.append(shared)
+        grid.attach(*arrays, shared_memory=self.blocks)
+        layout = [(block.name, array.shape, array.dtype.str) for block, array in zip(self.blocks, arrays)]
+        self.pool = ProcessPoolExecutor(workers, initializer=_attach, initargs=(layout,))
+        self.finalizer = weakref.finalize(self, _release, self.pool, self.blocks)
+
+    def exploration_paths(self, positions: list) -> list:
+        # Returns the BFS paths of robots standing at the (x, y) positions
+        return self.map(_exploration_paths, positions)
+
+    def transport_paths(self, planner: str, pairs: list) -> list:
+        # Returns the paths between the (start, goal) pairs found by AStar ("astar") or Jump Point Search ("jps")
+        return self.map(_transport_paths, pairs, planner)
+
+    def map(self, function, items: list, *args) -> list:
+        # Splits the items into one chunk per worker, so every worker gets a single task, and joins the results
+        time_start = time.perf_counter() if self.grid.stats is not None else None
+        chunks = [items[i::self.workers] for i in range(min(self.workers, len(items)))]
+        results = [None] * len(items)
+        futures = [self.pool.submit(function, chunk, *args) for chunk in chunks]
+        for i, future in enumerate(futures):
+            results[i::self.workers] = future.result()
+        if time_start is not None:
+            self.grid.stats.record("parallel_plan", time.perf_counter() - time_start, len(items))
+        return results
+
+    def close(self):
+        # Stops the workers and unlinks the shared memory, the grid keeps its mapping in this process
+        self.finalizer()
+        self.pool = None
+
+
+def _release(pool: ProcessPoolExecutor, blocks: list):
+    # Stops the workers and unlinks the shared memory blocks, called once by the finalizer of the planner
+    pool.shutdown()
+    for block in blocks:
+        block.unlink()
+
+
+def _attach(layout: list):
+    # Creates the grid of a worker process on the shared memory blocks
+    global _grid
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in layout]
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+              for block, (_, shape, dtype) in zip(blocks, layout)]
+    _grid = Grid(arrays[0], padded=True)
+    _grid.attach(*arrays, shared_memory=blocks)
+
+
+def _exploration_paths(positions: list) -> list:
+    # Plans the exploration paths of one chunk in a worker
+    return [BFS(Robot(x, y), _grid) for x, y in positions]
+
+
+def _transport_paths(pairs: list, planner: str) -> list:
+    # Plans the transport paths of one chunk in a worker
+    search = JPS if planner == "jps" else AStar
+    return [search(start, goal, _grid) for start, goal in pairs]
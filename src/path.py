@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class Path:
+    # Path stored as an int32 array of flat positions (x * width + y) ordered like the search results, the goal
+    # first and the next position last. Positions are consumed by moving a cursor, so moving along the path or
+    # reading its goal never copies the array.
+
+    def __init__(self, positions: np.array, width: int):
+        self.positions = positions
+        self.width = width
+        self.start = 0  # Index of the goal in positions
+        self.cursor = positions.size  # Positions in [start, cursor) are still to be visited
+
+    @classmethod
+    def from_padded(cls, positions: np.array, padded_width: int):
+        # Creates the path from flat positions of the padded grid used by the search engines
+        x, y = np.divmod(positions, padded_width)
+        return cls(((x - 1) * (padded_width - 2) + (y - 1)).astype(np.int32), padded_width - 2)
+
+    @classmethod
+    def empty(cls, width: int):
+        # Creates a path without any positions
+        return cls(np.empty(0, dtype=np.int32), width)
+
+    def __len__(self):
+        return self.cursor - self.start
+
+    def __getitem__(self, i: int) -> tuple:
+        # Returns the i-th remaining position counted from the goal
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Path index out of range")
+        return divmod(int(self.positions[self.start + i]), self.width)
+
+    def __iter__(self):
+        # Iterates the remaining positions from the goal to the next position
+        for position in self.positions[self.start:self.cursor].tolist():
+            yield divmod(position, self.width)
+
+    def pop(self) -> tuple:
+        # Returns the next position and moves the cursor past it
+        if self.cursor == self.start:
+            raise IndexError("pop from empty path")
+        self.cursor -= 1
+        return divmod(int(self.positions[self.cursor]), self.width)
+
+    def skip(self, count: int) -> np.array:
+        # Moves the cursor past the next count positions at once and returns them in the order of visiting
+        count = min(count, len(self))
+        skipped = self.positions[self.cursor - count:self.cursor][::-1]
+        self.cursor -= count
+        return skipped
+
+    def goal(self) -> tuple:
+        # Returns the last position of the path
+        return self[0]
@@ -1,4 +1,5 @@
 from src.bfs import BFS
+import numpy as np
 
 
 class Robot:
@@ -8,8 +9,8 @@ class Robot:
         self.carry_maze = False
         self.path = []
 
-    def transportation_move(self, grid):
-        # Check if the robot has predetermined path
+    def transportation_move(self, grid, explore: bool = True):
+        # Check if the robot has predetermined path, explore=False leaves the sensing to the caller
         if len(self.path) == 0:
             if grid.grid[self.x, self.y] == 2:
                 # If there is a maze at the current position, the robot will pick up maze
@@ -24,27 +25,35 @@ class Robot:
                 raise ValueError(f"No maze in position {self.x}, {self.y}!")
         # moving the robot to the next position
         self.x, self.y = self.path.pop()
-        self.explore(grid)
+        if explore:
+            self.explore(grid)
         return False
 
     def explore(self, grid):
         # Marks the current position as explored
-        grid.explored[self.x, self.y] = True
+        x, y = self.x, self.y
+        grid.mark_explored(x, y)
         grid_shape = grid.grid.shape
 
         # Explores adjacent positions in the grid
         for i in [1, -1]:
-            if 0 <= self.x + i < grid_shape[0]:
-                grid.explored[self.x + i, self.y] = True
-            if 0 <= self.y + i < grid_shape[1]:
-                grid.explored[self.x, self.y + i] = True
+            if 0 <= x + i < grid_shape[0]:
+                grid.mark_explored(x + i, y)
+            if 0 <= y + i < grid_shape[1]:
+                grid.mark_explored(x, y + i)
         return
 
-    def exploration_move(self, grid):
+    def needs_replan(self, grid) -> bool:
         # Checks if the robot has no more steps to take or the exploration level of the destination position become zero
-        if len(self.path) == 0 or grid.calculate_exploration_level(*self.path[0]) == 0:
+        return len(self.path) == 0 or grid.calculate_exploration_level(*self.path.goal()) == 0
+
+    def exploration_move(self, grid):
+        # Plans a new path when the old one is used up or leads nowhere useful anymore
+        if self.needs_replan(grid):
             # Uses the Breadth-First Search algorithm to find a new path for exploration
             self.path = BFS(self, grid)
+            if grid.stats is not None:
+                grid.stats.count("exploration_replan")
         if len(self.path) == 0:
             # Zero path indicates that there is nothing more to explore
             return False
@@ -53,3 +62,82 @@ class Robot:
         self.x, self.y = self.path.pop()
         return True
 
+
+class RobotFleet:
+    # Robots stored as a struct of arrays, positions, carry flags and paths of all robots are kept in one list each
+    # and the sensing of the whole fleet is one vectorized scatter. Plain lists keep the reads and writes of single
+    # robots in the rounds as cheap as attributes, positions() gives NumPy arrays for the whole fleet. Iterating the
+    # fleet yields FleetRobot views of the robots still in the fleet, so it can be used anywhere a list of robots is
+    # expected.
+
+    def __init__(self, robots: list[Robot]):
+        self.x = [int(r.x) for r in robots]
+        self.y = [int(r.y) for r in robots]
+        self.carry_maze = [bool(r.carry_maze) for r in robots]
+        self.paths = [r.path for r in robots]
+        self.active = np.ones(len(robots), dtype=bool)  # Robots removed from the fleet stay in the arrays
+        self.views = [FleetRobot(self, i) for i in range(len(robots))]
+        self.members = list(self.views)  # Views of the robots still in the fleet, in the original order
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(list(self.members))
+
+    def __getitem__(self, i):
+        return self.members[i]
+
+    def remove(self, robot):
+        # Removes the robot from the fleet
+        self.members.remove(robot)
+        self.active[robot.i] = False
+
+    def positions(self) -> tuple:
+        # Returns the x and y arrays of the robots still in the fleet
+        return np.array(self.x, dtype=np.int64)[self.active], np.array(self.y, dtype=np.int64)[self.active]
+
+    def explore(self, grid):
+        # Marks the positions of all robots in the fleet and their neighbours as explored at once
+        x, y = self.positions()
+        grid.mark_explored_many(np.concatenate([x, x - 1, x + 1, x, x]), np.concatenate([y, y, y, y - 1, y + 1]))
+
+
+class FleetRobot(Robot):
+    # View of one robot of a RobotFleet, the state is read from and written to the arrays of the fleet
+
+    def __init__(self, fleet: RobotFleet, i: int):
+        self.fleet = fleet
+        self.i = i
+
+    @property
+    def x(self) -> int:
+        return self.fleet.x[self.i]
+
+    @x.setter
+    def x(self, value: int):
+        self.fleet.x[self.i] = value
+
+    @property
+    def y(self) -> int:
+        return self.fleet.y[self.i]
+
+    @y.setter
+    def y(self, value: int):
+        self.fleet.y[self.i] = value
+
+    @property
+    def carry_maze(self) -> bool:
+        return self.fleet.carry_maze[self.i]
+
+    @carry_maze.setter
+    def carry_maze(self, value: bool):
+        self.fleet.carry_maze[self.i] = value
+
+    @property
+    def path(self) -> list:
+        return self.fleet.paths[self.i]
+
+    @path.setter
+    def path(self, value: list):
+        self.fleet.paths[self.i] = value
@@ -0,0 +1,56 @@
+from collections import defaultdict
+import json
+
+
+class Stats:
+    # Counters and timers of the hot paths. Profiling is enabled by setting grid.stats (MainController does it with
+    # its stats argument), every instrumented place checks it first, so a disabled run pays one attribute read.
+
+    def __init__(self, trace_path: str = None):
+        self.calls = defaultdict(int)  # Number of calls of each instrumented function
+        self.times = defaultdict(float)  # Total wall time spent in each instrumented function
+        self.expanded = defaultdict(int)  # Nodes expanded by each search
+        self.trace_path = trace_path
+        self.trace = None if trace_path is None else open(trace_path, "w")
+        self._round_calls = defaultdict(int)
+        self._round_times = defaultdict(float)
+
+    def record(self, name: str, elapsed: float, expanded: int = 0):
+        # Records one call of an instrumented function
+        self.calls[name] += 1
+        self.times[name] += elapsed
+        self.expanded[name] += expanded
+        self._round_calls[name] += 1
+        self._round_times[name] += elapsed
+
+    def count(self, name: str):
+        # Records one call of a function too cheap to be timed
+        self.calls[name] += 1
+        self._round_calls[name] += 1
+
+    def end_round(self, phase: str, step: int, elapsed: float):
+        # Records the time of one simulation round and writes the round to the trace
+        self.record(f"{phase}_round", elapsed)
+        if self.trace is not None:
+            self.trace.write(json.dumps({"phase": phase, "step": step, "calls": self._round_calls,
+                                         "times": self._round_times}) + "\n")
+        self._round_calls = defaultdict(int)
+        self._round_times = defaultdict(float)
+
+    def summary(self) -> dict:
+        # Returns the collected statistics as a dictionary keyed by the instrumented names
+        return {name: {"calls": self.calls[name], "time": self.times[name], "expanded": self.expanded[name]}
+                for name in sorted(self.calls)}
+
+    def print(self):
+        # Prints the collected statistics
+        print(f"{'name':<30}{'calls':>10}{'time [s]':>12}{'expanded':>12}")
+        for name, values in self.summary().items():
+            print(f"{name:<30}{values['calls']:>10}{values['time']:>12.4f}{values['expanded']:>12}")
+
+    def close(self):
+        # Closes the trace file
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
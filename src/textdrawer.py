@@ -0,0 +1,46 @@
+import numpy as np
+import sys
+import time
+
+# Size of the write buffer of output files, large frames are written without splitting
+BUFFER_SIZE = 1 << 20
+
+
+class TextDrawer:
+    # Writes the steps of the simulation as text frames (see Grid.text_frame) to a file or to the console. Every
+    # frame is rendered as one byte array and written with one call to a buffered stream. Only every
+    # frame_skip-th step is written, and with changed_rows only the rows that changed since the last written
+    # frame are written, each prefixed with its index. Frames end with an empty line like in Grid.print.
+
+    def __init__(self, path: str = None, frame_skip: int = 1, changed_rows: bool = False):
+        self.file = open(path, "wb", buffering=BUFFER_SIZE) if path is not None else None
+        self.stream = self.file if self.file is not None else sys.stdout.buffer
+        self.frame_skip = max(frame_skip, 1)  # Every frame_skip-th step is written
+        self.changed_rows = changed_rows
+        self.frame = None  # Last written frame
+        self.steps = 0  # Number of draw_grid calls
+
+    def draw_grid(self, grid, robots, explored=False):
+        # Writes the grid with the robots, the same interface as PygameDrawer.draw_grid
+        self.steps += 1
+        if (self.steps - 1) % self.frame_skip != 0:
+            return
+        time_start = time.perf_counter() if grid.stats is not None else None
+
+        frame = grid.text_frame(robots, explored)
+        if self.changed_rows and self.frame is not None:
+            rows = np.flatnonzero((frame != self.frame).any(axis=1))
+            self.stream.write(b"".join(b"%d " % row + frame[row].tobytes() for row in rows.tolist()) + b"\n")
+        else:
+            self.stream.write(frame.tobytes() + b"\n")
+        self.frame = frame
+
+        if time_start is not None:
+            grid.stats.record("draw_text", time.perf_counter() - time_start)
+
+    def close(self):
+        # Writes the buffered output and closes the file
+        self.stream.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,78 @@
+from src.grid import Grid
+import numpy as np
+import struct
+
+# Trajectory file: header, the grid values and the explored array when the recording began, each as height * width
+# bytes, and then one record per recorded step appended as the simulation runs
+MAGIC = b"MAZETRAJ"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII")  # magic, version, height, width, number of robots
+
+# States of the robots in the records
+FREE, CARRYING, LEFT = 0, 1, -1
+
+
+def record_dtype(n_robots: int) -> np.dtype:
+    # Layout of one record: the step, robot positions and robot states (FREE, CARRYING or LEFT)
+    return np.dtype([("step", "<i4"), ("x", "<i4", (n_robots,)), ("y", "<i4", (n_robots,)),
+                     ("state", "i1", (n_robots,))])
+
+
+class TrajectoryLog:
+    # Append-only log of the robot positions and carry flags after every round. Records are collected in a
+    # preallocated array and streamed to the file whenever it fills up, so recording never holds the whole run.
+    # Together with the grid at the beginning the records are enough to replay the run: mazes disappear where a
+    # robot starts carrying and robots explore the positions around them.
+
+    def __init__(self, path: str, grid: Grid, robots, buffer_steps: int = 1024):
+        self.file = open(path, "wb")
+        height, width = grid.grid.shape
+        self.file.write(HEADER.pack(MAGIC, VERSION, height, width, len(robots.x)))
+        self.file.write(np.ascontiguousarray(grid.grid, dtype=np.int8).tobytes())
+        self.file.write(np.ascontiguousarray(grid.explored, dtype=np.uint8).tobytes())
+        self.buffer = np.zeros(buffer_steps, dtype=record_dtype(len(robots.x)))
+        self.n_buffered = 0
+
+    def record(self, step: int, robots):
+        # Appends the state of all robots of the fleet after the step
+        i = self.n_buffered
+        self.buffer["step"][i] = step
+        self.buffer["x"][i] = robots.x
+        self.buffer["y"][i] = robots.y
+        self.buffer["state"][i] = np.where(robots.active, np.array(robots.carry_maze, dtype=np.int8), LEFT)
+        self.n_buffered += 1
+        if self.n_buffered == self.buffer.size:
+            self.flush()
+
+    def flush(self):
+        # Writes the buffered records to the file
+        self.file.write(self.buffer[:self.n_buffered].tobytes())
+        self.file.flush()
+        self.n_buffered = 0
+
+    def close(self):
+        # Writes the remaining records and closes the file
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+def read_trajectory(path: str):
+    # Reads a trajectory file, returns the grid values and the explored array when the recording began and the
+    # memory-mapped records
+    with open(path, "rb") as file:
+        magic, version, height, width, n_robots = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a trajectory file of version {VERSION}!")
+        cells = np.frombuffer(file.read(height * width), dtype=np.int8).reshape(height, width)
+        explored = np.frombuffer(file.read(height * width), dtype=np.uint8).reshape(height, width)
+        offset = file.tell()
+        file.seek(0, 2)
+        n_records = (file.tell() - offset) // record_dtype(n_robots).itemsize
+
+    if n_records == 0:
+        # Memory maps cannot be empty
+        return cells.copy(), explored.astype(bool), np.zeros(0, dtype=record_dtype(n_robots))
+    records = np.memmap(path, dtype=record_dtype(n_robots), mode="r", offset=offset, shape=(n_records,))
+    return cells.copy(), explored.astype(bool), records
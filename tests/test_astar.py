@@ -0,0 +1,59 @@
+from src.astar import AStar
+from src.grid import Grid
+from src.gridfile import read_grid_file
+import numpy as np
+import pytest
+
+# Path lengths found by the original list based AStar on the fully explored grids, from the start to every maze
+# (in the order of np.argwhere) and from every robot to the start, 0 where the goal cannot be reached
+LENGTHS = {
+    "grids/grid1.txt": ([14, 58, 55, 67, 49, 61, 68, 44],
+                        [105, 104, 103, 102, 101, 100]),
+    "grids/grid2.txt": ([106, 92, 48, 0, 51, 39, 57, 45, 38, 62],
+                        [1, 2, 3, 4, 5, 6]),
+    "grids/grid3.txt": ([0, 0, 0, 0, 0, 0, 0, 0, 0],
+                        [0, 0, 0, 0, 0, 0]),
+    "grids/grid_big1.txt": ([577, 788, 588, 553, 867, 721, 1141, 912, 599, 1201, 951, 57, 92, 397, 1000, 446, 124,
+                             267, 279, 436, 225, 384, 500],
+                            [1358, 1357, 1356, 1350, 1355, 1351, 1354, 1353, 1352]),
+    "grids/grid_big2.txt": ([219, 209, 25, 129, 339, 42, 22, 186, 187, 346, 340, 147, 302, 120, 271, 160, 88, 394,
+                             263, 400, 378, 264, 200, 436, 437, 222, 205, 374, 239, 362, 338, 320, 251, 299, 380, 380,
+                             397, 384, 289, 349, 296, 353, 376, 363, 286, 324, 275, 356, 395, 408],
+                            [374, 373, 374, 375, 376, 377, 378, 379, 380, 381, 382]),
+}
+
+
+def check_path(path, start, goal, grid):
+    # Checks that the path leads from the start to the goal through passable positions, one step at a time
+    positions = [tuple(p) for p in reversed(list(path))]
+    assert positions[-1] == goal
+    for previous, position in zip([start] + positions, positions):
+        assert abs(previous[0] - position[0]) + abs(previous[1] - position[1]) == 1
+        assert grid.grid[position] > -1
+
+
+@pytest.mark.parametrize("path", sorted(LENGTHS))
+def test_path_lengths_match_original(path):
+    grid, robots = read_grid_file(path)
+    grid.explored[:] = 1
+    start = tuple(int(v) for v in grid.start)
+    to_mazes, from_robots = LENGTHS[path]
+
+    mazes = [tuple(int(v) for v in maze) for maze in np.argwhere(grid.grid == 2)]
+    pairs = [(start, maze) for maze in mazes] + [((r.x, r.y), start) for r in robots]
+    lengths = list()
+    for begin, goal in pairs:
+        found = AStar(begin, goal, grid)
+        lengths.append(len(found))
+        if len(found) > 0:
+            check_path(found, begin, goal, grid)
+    assert lengths == to_mazes + from_robots
+
+
+def test_path_does_not_wrap_around_rows():
+    # An open grid without a wall border, the neighbours of the row ends lie in the same row only
+    grid = Grid(np.zeros((5, 8), dtype=np.int8))
+    grid.explored[:] = 1
+    found = AStar((2, 0), (1, 7), grid)
+    assert len(found) == 8
+    check_path(found, (2, 0), (1, 7), grid)
@@ -0,0 +1,50 @@
+from src.bfs import BFSEngine
+from src.generator import generate
+from src.grid import Grid
+from src.incremental import IncrementalBFS
+from src.maincontroler import MainController, load_from_file
+from src.robot import Robot
+import numpy as np
+import pytest
+
+
+class ComparingEngine:
+    # Runs BFSEngine and IncrementalBFS on every search of the simulation and counts the paths that differ
+    def __init__(self, grid):
+        self.bfs = BFSEngine(grid)
+        self.incremental = IncrementalBFS(grid)
+        self.searches = 0
+        self.different = 0
+        self.expanded = 0
+
+    def search(self, x, y):
+        path = self.bfs.search(x, y)
+        other = self.incremental.search(x, y)
+        self.searches += 1
+        if not np.array_equal(path.positions[path.start:path.cursor], other.positions[other.start:other.cursor]):
+            self.different += 1
+        self.expanded = self.bfs.expanded
+        return path
+
+
+@pytest.mark.parametrize("kind, kwargs", [("maze", {}), ("maze", {"corridor": 2, "braid": 0.2}), ("rooms", {})])
+@pytest.mark.parametrize("seed", range(3))
+def test_paths_match_bfs_on_generated_grids(kind, kwargs, seed):
+    grid, robots = generate(kind, 41, 41, 5, 5, seed=seed, **kwargs)
+    mc = MainController(Grid(grid), [Robot(x, y) for x, y in robots])
+    engine = ComparingEngine(mc.grid)
+    mc.grid.bfs_engine = engine
+    mc.do_exploration()
+    assert engine.searches > 0
+    assert engine.different == 0
+
+
+@pytest.mark.parametrize("path", ["grids/grid1.txt", "grids/grid2.txt"])
+def test_exploration_matches_robot_planner(path):
+    expected = load_from_file(path)
+    expected.do_exploration()
+    mc = load_from_file(path, exploration_planner="incremental")
+    assert isinstance(mc.grid.bfs_engine, IncrementalBFS)
+    mc.do_exploration()
+    assert mc.exploration_steps == expected.exploration_steps
+    assert np.array_equal(mc.grid.explored, expected.grid.explored)
@@ -0,0 +1,29 @@
+from src.astar import AStar
+from src.generator import backtracker_maze
+from src.grid import Grid
+from src.junction import JunctionGraph
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_path_lengths_match_astar_on_braided_maze(seed):
+    # The map is explored in chunks and the graph is updated incrementally, loops appear and are split again
+    grid = Grid(backtracker_maze(41, 41, corridor=2, braid=0.3, seed=seed))
+    graph = JunctionGraph(grid)
+    rng = np.random.default_rng(seed)
+    for chunk in np.array_split(rng.permutation(grid.grid.size), 30):
+        grid.mark_explored_many(chunk // grid.grid.shape[1], chunk % grid.grid.shape[1])
+        known = np.argwhere((grid.grid > -1) & (grid.explored > 0))
+        for _ in range(20):
+            start, goal = (tuple(int(v) for v in p) for p in known[rng.integers(len(known), size=2)])
+            assert len(graph.find_path(start, goal)) == len(AStar(start, goal, grid))
+
+
+def test_goal_on_a_loop_takes_the_shorter_way_round():
+    # The goal lies on a corridor leaving and entering the same node, only one way round is short
+    grid = Grid(backtracker_maze(41, 41, corridor=2, braid=0.3, seed=4))
+    chunks = np.array_split(np.random.default_rng(4).permutation(grid.grid.size), 30)
+    for chunk in chunks[:11]:
+        grid.mark_explored_many(chunk // grid.grid.shape[1], chunk % grid.grid.shape[1])
+    assert len(JunctionGraph(grid).find_path((22, 27), (23, 26))) == len(AStar((22, 27), (23, 26), grid))
@@ -0,0 +1,48 @@
+from src.maincontroler import load_from_file, load_snapshot
+import numpy as np
+import pytest
+
+GRIDS = ["grids/grid1.txt", "grids/grid2.txt"]
+
+
+class Interrupt(Exception):
+    pass
+
+
+class InterruptingDrawer:
+    # Stands in for PygameDrawer and stops the running phase after the given number of drawn steps
+    def __init__(self, steps: int):
+        self.steps = steps
+
+    def draw_grid(self, grid, robots, explored=False):
+        self.steps -= 1
+        if self.steps == 0:
+            raise Interrupt
+
+
+def run(mc, mode: str, pg_drawer=None, exploration_done: bool = False):
+    # Runs the phases of the mode, returns the steps, the carried mazes and the explored array
+    if mode == "overlapped":
+        mc.do_overlapped(pg_drawer=pg_drawer)
+    else:
+        if not exploration_done:
+            mc.do_exploration(pg_drawer=pg_drawer if mode == "exploration" else None)
+        mc.do_transportation(pg_drawer=pg_drawer, fast_forward=mode == "fast_forward")
+    return mc.exploration_steps, mc.transportation_steps, mc.carried_mazes(), mc.grid.explored.copy()
+
+
+@pytest.mark.parametrize("path", GRIDS)
+@pytest.mark.parametrize("mode", ["exploration", "transportation", "fast_forward", "overlapped"])
+def test_resume_matches_uninterrupted_run(path, mode, tmp_path):
+    expected = run(load_from_file(path), mode)
+
+    mc = load_from_file(path)
+    if mode in ("transportation", "fast_forward"):
+        mc.do_exploration()
+    with pytest.raises(Interrupt):
+        run(mc, mode, InterruptingDrawer(5), exploration_done=mode in ("transportation", "fast_forward"))
+    mc.save_snapshot(tmp_path / "snapshot.npz")
+
+    resumed = run(load_snapshot(tmp_path / "snapshot.npz"), mode, exploration_done=mode != "exploration")
+    assert resumed[:3] == expected[:3]
+    assert np.array_equal(resumed[3], expected[3])